@@ -3,12 +3,26 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from bson import ObjectId
-from datetime import datetime
+from bson.errors import InvalidId
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import os
+import time
+import threading
+import json
+import base64
+import binascii
 
 # Import the correct functions
 from modules.news_fetcher import fetch_news_to_queue
 from modules.reddit_fetcher import fetch_hot_posts_praw # Use PRAW function
+from modules.search_cache import TTLCache
+from modules.hot_snapshots import HotListRefresher
+from modules.db_setup import ensure_indexes
+from modules.circuit_breaker import CircuitBreaker, CircuitOpenError
+from modules.lazy_resource import readiness, warm_up
+
+boot_started = time.perf_counter()
 
 # Load environment variables
 load_dotenv()
@@ -18,7 +32,7 @@ app = Flask(__name__)
 
 # Configure CORS using environment variable
 frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:5173')
-CORS(app, resources={r"/api/*": {"origins": frontend_url}})
+CORS(app, resources={r"/api/*": {"origins": frontend_url}}, expose_headers=["X-Snapshot-Refreshed-At", "X-Next-Cursor", "X-Result-Status", "X-Degraded-Reason"])
 
 # MongoDB Atlas connection
 MONGO_URI = os.getenv("MONGO_URI")
@@ -37,6 +51,56 @@ except Exception as e:
     print(f"CRITICAL ERROR: Could not connect to MongoDB: {e}")
     exit(1)
 
+ensure_indexes(db)
+
+
+# Cache of normalized news query -> fresh article links from Finlight
+news_link_cache = TTLCache(
+    maxsize=int(os.getenv("NEWS_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("NEWS_CACHE_TTL", 300)),
+    stale_ttl=float(os.getenv("NEWS_CACHE_STALE_TTL", 900))
+)
+
+
+# Per-request latency budget; the upstream lookup gets UPSTREAM_BUDGET_SHARE of it,
+# the rest is left for answering from the DB fallback
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", 3.0))
+UPSTREAM_BUDGET_SHARE = float(os.getenv("UPSTREAM_BUDGET_SHARE", 0.6))
+
+finlight_breaker = CircuitBreaker(
+    "finlight",
+    failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 3)),
+    cooldown=float(os.getenv("CIRCUIT_COOLDOWN", 60)),
+    # Lookups that overrun the request's upstream budget count as failures
+    slow_call_seconds=SEARCH_DEADLINE * UPSTREAM_BUDGET_SHARE
+)
+reddit_breaker = CircuitBreaker(
+    "reddit",
+    failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 3)),
+    cooldown=float(os.getenv("CIRCUIT_COOLDOWN", 60))
+)
+
+
+def with_result_status(response, degraded_reason=None):
+    """Marks a search response as served from fresh upstream data or degraded to the DB fallback."""
+    response.headers["X-Result-Status"] = "degraded" if degraded_reason else "fresh"
+    if degraded_reason:
+        response.headers["X-Degraded-Reason"] = degraded_reason
+    return response
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+def fetch_fresh_news_links(query):
+    """Fetches unique article links for a query from Finlight (the expensive upstream call)."""
+    fresh_news_info = fetch_news_to_queue(query, pageSize=20, return_raw=True)
+    if not fresh_news_info:
+        return []
+    # Use 'link' as the unique identifier stored as 'post_id' in the DB
+    return list(set([article['link'] for article in fresh_news_info if 'link' in article]))
+
 
 def serialize_doc(doc):
     """Converts MongoDB doc (_id, dates) to JSON-serializable format."""
@@ -52,50 +116,206 @@ def serialize_doc(doc):
             doc[key] = doc[key].isoformat().replace("+00:00", "Z")
     return doc
 
+# Fields the search result cards render; full documents come from the detail endpoints
+NEWS_CARD_PROJECTION = {
+    "post_id": 1, "title": 1, "summary": 1, "sentiment": 1, "topics": 1,
+    "ner_results": 1, "publishDate": 1, "link": 1, "source": 1, "canonical_id": 1,
+}
+REDDIT_CARD_PROJECTION = {
+    **NEWS_CARD_PROJECTION, "subreddit": 1, "score": 1, "num_comments": 1,
+}
+MAX_PAGE_SIZE = 50
+
+
+def encode_cursor(last_doc, exclude):
+    """Opaque cursor that continues the fallback query.
+
+    It points just past last_doc in (publishDate, _id) order, or at the start
+    when last_doc is None, and carries the post_ids the first page showed as
+    fresh matches so later pages leave them out.
+    """
+    payload = {"x": sorted(exclude)}
+    if last_doc is not None:
+        payload.update(d=last_doc.get("publishDate"), i=last_doc.get("id"))
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Fallback filter for the page a cursor points at, and the post_ids it excludes."""
+    data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    exclude = [str(post_id) for post_id in data.get("x", [])]
+    criteria = {}
+    if "i" in data:
+        # Documents that sort after the cursor in (publishDate desc, _id desc) order
+        publish_date, doc_id = data["d"], ObjectId(data["i"])
+        criteria["$or"] = [
+            {"publishDate": {"$lt": publish_date}},
+            {"publishDate": publish_date, "_id": {"$lt": doc_id}},
+        ]
+    if exclude:
+        criteria["post_id"] = {"$nin": exclude}
+    return criteria, exclude
+
+
+def page_params(default_limit, card_projection):
+    """Reads limit/view/cursor query params. Raises ValueError on malformed input.
+
+    Returns:
+        tuple: (limit, projection, fallback filter from the cursor or None on the first page, excluded post_ids)
+    """
+    limit = max(1, min(int(request.args.get('limit', default_limit)), MAX_PAGE_SIZE))
+    projection = None if request.args.get('view', 'card') == 'full' else card_projection
+    cursor = request.args.get('cursor')
+    after, exclude = None, []
+    if cursor:
+        try:
+            after, exclude = decode_cursor(cursor)
+        except (binascii.Error, KeyError, TypeError, ValueError, AttributeError, InvalidId) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+    return limit, projection, after, exclude
+
+
+def paged_response(items, next_cursor):
+    """JSON list response; X-Next-Cursor is set when another page may exist."""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def result_sort_key(doc):
+    return (doc.get("publishDate") or "", doc.get("id") or "")
+
+
+# Runs the speculative fallback queries alongside each request's upstream lookup
+search_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SEARCH_THREADS", 16)))
+
+# Upstream lookups get their own small pool so a hung upstream cannot starve the fallback queries.
+# Requests that find every upstream thread taken skip the lookup instead of queueing behind it.
+UPSTREAM_THREADS = int(os.getenv("UPSTREAM_THREADS", 4))
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_THREADS)
+upstream_slots = threading.BoundedSemaphore(UPSTREAM_THREADS)
+
+
+class UpstreamBusyError(Exception):
+    """Raised instead of queueing an upstream lookup while every upstream thread is taken."""
+
+
+def submit_upstream(fn, *args):
+    """Runs fn on the upstream pool. Raises UpstreamBusyError if no upstream thread is free."""
+    if not upstream_slots.acquire(blocking=False):
+        raise UpstreamBusyError("Every upstream thread is busy")
+    try:
+        future = upstream_executor.submit(fn, *args)
+    except Exception:
+        upstream_slots.release()
+        raise
+    future.add_done_callback(lambda _: upstream_slots.release())
+    return future
+
+
+def remaining_budget(started):
+    return max(SEARCH_DEADLINE - (time.monotonic() - started), 0)
+
+
+def find_latest(collection, criteria, projection, limit):
+    """Newest-first page of serialized docs in (publishDate, _id) order."""
+    cursor = collection.find(criteria, projection).sort([("publishDate", -1), ("_id", -1)]).limit(limit)
+    # The server stops the query once no request could still use its result
+    cursor = cursor.max_time_ms(int(SEARCH_DEADLINE * 1000))
+    return [serialize_doc(doc) for doc in cursor]
+
+
 @app.route('/api/news/search')
 def search_news():
     print("/api/news/search triggered")
-    query = request.args.get('query', '').lower()
-    MIN_ARTICLES = 10 # Target minimum articles to return
+    started = time.monotonic()
+    query = normalize_query(request.args.get('query', ''))
+    MIN_ARTICLES = 10 # Default page size
 
     if not query:
-        return jsonify([])
+        return with_result_status(jsonify([]))
 
-    # Step 1: Fetch identifiers (links) for potentially relevant fresh articles
+    try:
+        MIN_ARTICLES, projection, after, exclude = page_params(MIN_ARTICLES, NEWS_CARD_PROJECTION)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Step 1: Start the fallback query now so it overlaps the upstream lookup.
+    # It fetches a full page; results that turn out to be fresh matches are dropped when merging,
+    # which leaves exactly what a fallback excluding the fresh matches would have returned.
+    fallback_query_criteria = {
+        # Match against the normalized entity keys stored at write time (uses the ner_keys index)
+        "ner_keys": query,
+        # Near-duplicate copies of a story are left out; their canonical article is returned instead
+        "canonical_id": None,
+    }
+    if after:
+        fallback_query_criteria.update(after)
+    fallback_future = search_executor.submit(
+        find_latest, news_collection, fallback_query_criteria, projection, MIN_ARTICLES
+    )
+
+    # Step 2: Fetch identifiers (links) for potentially relevant fresh articles (cached per query)
+    # Later pages ("load more") only continue the date-ordered DB query
     fresh_article_links = []
+    degraded_reason = None
     try:
-        fresh_news_info = fetch_news_to_queue(query, pageSize=20, return_raw=True)
-        if fresh_news_info:
-            # Use 'link' as the unique identifier stored as 'post_id' in the DB
-            fresh_article_links = list(set([article['link'] for article in fresh_news_info if 'link' in article]))
-            if fresh_article_links:
-                 print(f"✅ Found {len(fresh_article_links)} unique potential article links for query '{query}'.")
-            else:
-                 print(f"⚠️ Could not extract links from fetch results for query: {query}")
+        if after is None:
+            # The lookup runs on the upstream pool and is abandoned once its share of the budget
+            # is spent, also by requests coalesced onto it; if it completes later it still lands
+            # in the cache for the next request
+            upstream_budget = max(SEARCH_DEADLINE * UPSTREAM_BUDGET_SHARE - (time.monotonic() - started), 0)
+            fresh_article_links = news_link_cache.get_or_load(
+                query, lambda: finlight_breaker.call(fetch_fresh_news_links, query),
+                timeout=upstream_budget, run=submit_upstream
+            )
+        if fresh_article_links:
+             print(f"✅ Found {len(fresh_article_links)} unique potential article links for query '{query}'.")
         else:
              print(f"⚠️ No fresh news articles found via fetch for query: {query}")
              # Proceed to fallback if fetch returns None or empty
 
+    except TimeoutError:
+        degraded_reason = "upstream_timeout"
+        print(f"⏱️ News fetch for query '{query}' exceeded its budget; answering from DB fallback.")
+    except CircuitOpenError:
+        degraded_reason = "circuit_open"
+        print(f"⚠️ Skipping news fetch for query '{query}': Finlight circuit is open.")
+    except UpstreamBusyError:
+        degraded_reason = "upstream_busy"
+        print(f"⚠️ Skipping news fetch for query '{query}': every upstream thread is busy.")
     except Exception as e:
+        degraded_reason = "upstream_error"
         print(f"❌ Error during news fetch for query '{query}': {e}")
         # Allow fallback even if fetch fails
 
     processed_articles = []
-    found_article_db_ids = set() # Track MongoDB '_id' (as 'id' string) to prevent duplicates
+    found_article_links = set() # Track 'post_id' (article link) to prevent duplicates
 
-    # Step 2: Query DB for articles matching the fetched links
+    # Step 3: Query DB for articles matching the fetched links
     if fresh_article_links:
         print(f"🔍 Querying DB for matches to {len(fresh_article_links)} links...")
         try:
             # Match based on 'post_id' which stores the article link
-            results_cursor = news_collection.find({"post_id": {"$in": fresh_article_links}})
+            results_cursor = news_collection.find({"post_id": {"$in": fresh_article_links}}, projection)
             initial_articles = [serialize_doc(doc) for doc in results_cursor]
 
             for article in initial_articles:
-                # Ensure article is valid and we haven't added it already via another link (unlikely but safe)
-                if article and article.get('id') not in found_article_db_ids:
+                # Ensure article is valid and we haven't added it already via another link,
+                # counting a near-duplicate copy as its canonical article
+                if not article:
+                    continue
+                story_id = article.get('canonical_id') or article.get('post_id')
+                if story_id not in found_article_links:
                      processed_articles.append(article)
-                     found_article_db_ids.add(article['id'])
+                     found_article_links.add(story_id)
+
+            # Newest fresh matches first; only a page's worth is shown
+            processed_articles.sort(key=result_sort_key, reverse=True)
+            processed_articles = processed_articles[:MIN_ARTICLES]
+            found_article_links = {article.get('canonical_id') or article.get('post_id') for article in processed_articles}
+            exclude = sorted(found_article_links)
 
             print(f"✅ Found {len(processed_articles)} articles in DB matching fresh links.")
 
@@ -103,54 +323,61 @@ def search_news():
             print(f"❌ Database error querying news_collection for fresh links: {e}")
             # Allow fallback
 
-    # Step 3: Fallback Query if not enough articles found yet
+    # Step 4: Merge in fallback results if not enough articles found yet.
+    # The next page continues the fallback query just past the last fallback article looked at.
     num_found = len(processed_articles)
+    next_cursor = encode_cursor(None, exclude) if num_found >= MIN_ARTICLES else None
     if num_found < MIN_ARTICLES:
         needed = MIN_ARTICLES - num_found
-        print(f"⚠️ Only found {num_found} matching fresh articles. Performing fallback query for {needed} more...")
+        print(f"⚠️ Only found {num_found} matching fresh articles. Adding up to {needed} from fallback query...")
 
         try:
-            fallback_query_criteria = {
-                # Exclude articles we already found via the link match
-                # Note: We are comparing against the MongoDB '_id' (as 'id') here
-                "id": {"$nin": list(found_article_db_ids)},
-                # Match against NER results for relevance
-                "ner_results": {
-                    "$elemMatch": {
-                        "text": {
-                            "$regex": query,
-                            "$options": "i" # Case-insensitive match
-                        }
-                    }
-                }
-            }
-            # Sort by date within the fallback query, limit to needed amount
-            fallback_cursor = news_collection.find(fallback_query_criteria).sort("publishDate", -1).limit(needed)
-            fallback_articles = [serialize_doc(doc) for doc in fallback_cursor]
-
-            # Add unique fallback articles (double check uniqueness based on 'id')
+            fallback_articles = fallback_future.result(timeout=remaining_budget(started))
+
+            # Add fallback articles we don't already have (based on 'post_id'), newest first
+            added = 0
+            last_seen = None
             for article in fallback_articles:
-                 if article and article.get('id') not in found_article_db_ids:
+                if added >= needed:
+                    break
+                last_seen = article
+                if article and article.get('post_id') not in found_article_links:
                     processed_articles.append(article)
-                    # No need to add to found_article_db_ids now, but good practice if logic changed
-                    # found_article_db_ids.add(article['id'])
+                    found_article_links.add(article.get('post_id'))
+                    added += 1
+
+            # A short fallback page walked to the end means there is nothing more to load
+            if last_seen is not None and (len(fallback_articles) >= MIN_ARTICLES or last_seen is not fallback_articles[-1]):
+                next_cursor = encode_cursor(last_seen, exclude)
 
-            print(f"✅ Added {len(fallback_articles)} articles from fallback query.")
+            print(f"✅ Added {added} articles from fallback query.")
 
+        except FutureTimeoutError:
+            fallback_future.cancel()
+            print(f"⏱️ Fallback query for '{query}' exceeded the search deadline; returning fresh matches only.")
         except Exception as e:
             print(f"❌ Database error during fallback query for '{query}': {e}")
             # Proceed with potentially fewer articles if fallback fails
+    else:
+        fallback_future.cancel()
 
-    # Step 4: Final Sort and Return
+    # Step 5: Final Sort and Return
     try:
         # Sort all collected articles (fresh matches + fallback) by publish date descending
-        processed_articles.sort(key=lambda x: x.get("publishDate", ""), reverse=True)
+        processed_articles.sort(key=result_sort_key, reverse=True)
         print(f"✅ Returning total {len(processed_articles)} articles for query '{query}'.")
-        return jsonify(processed_articles)
+        return with_result_status(paged_response(processed_articles, next_cursor), degraded_reason)
     except Exception as e:
          print(f"❌ Error during final processing/sorting: {e}")
          return jsonify({"error": "Failed during final processing"}), 500
 
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify({
+        "news_search": news_link_cache.snapshot(),
+        "circuits": {"finlight": finlight_breaker.snapshot(), "reddit": reddit_breaker.snapshot()},
+    })
+
 # --- Reddit Search Route (Using PRAW) ---
 SUBREDDIT_MAP = {
     'stockmarket': 'StockMarket',
@@ -162,67 +389,87 @@ SUBREDDIT_MAP = {
     'bogleheads': 'Bogleheads',
 }
 
+# Hot post IDs per subreddit, kept fresh in the background
+hot_list_refresher = HotListRefresher(
+    SUBREDDIT_MAP.values(),
+    fetch_hot_posts_praw,
+    posts=20,
+    interval=float(os.getenv("REDDIT_SNAPSHOT_INTERVAL", 300)),
+    jitter=float(os.getenv("REDDIT_SNAPSHOT_JITTER", 0.2)),
+    breaker=reddit_breaker
+).start()
+# Snapshots older than this mean refreshes have been failing
+REDDIT_SNAPSHOT_MAX_AGE = float(os.getenv("REDDIT_SNAPSHOT_MAX_AGE", 3 * hot_list_refresher.interval))
+
 @app.route('/api/reddit/search')
 def search_reddit():
     print("/api/reddit/search triggered")
-    MIN_POSTS = 15 # Target minimum posts to return
+    started = time.monotonic()
+    MIN_POSTS = 15 # Default page size
 
     user_input = request.args.get('subreddit', 'stocks').lower()
     if user_input not in SUBREDDIT_MAP:
         return jsonify({"error": "Unsupported subreddit"}), 400
 
+    try:
+        MIN_POSTS, projection, after, exclude = page_params(MIN_POSTS, REDDIT_CARD_PROJECTION)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     subreddit = SUBREDDIT_MAP[user_input] # Use consistent casing for DB/PRAW
     print(f"✅ Subreddit selected: r/{subreddit}")
 
-    # Step 1: Fetch identifiers (post IDs) for currently hot posts via PRAW
-    fresh_post_ids = []
-    try:
-        limit = 20 # How many hot post IDs to attempt fetching
-        fresh_posts_info = fetch_hot_posts_praw(subreddit=subreddit, posts=limit)
-        if fresh_posts_info:
-            fresh_post_ids = list(set([post['post_id'] for post in fresh_posts_info if 'post_id' in post]))
-            if fresh_post_ids:
-                print(f"✅ Found {len(fresh_post_ids)} unique hot post IDs via PRAW for r/{subreddit}.")
-            else:
-                 print(f"⚠️ Could not extract post IDs from PRAW fetch results for r/{subreddit}")
-        else:
-             print(f"⚠️ No fresh post info returned by PRAW fetch for r/{subreddit}")
-             # Proceed to fallback if fetch returns None or empty
-
-    except Exception as e:
-        print(f"❌ Error during PRAW fetch for r/{subreddit}: {e}")
-        # Allow fallback even if PRAW fails
+    # Step 1: Read hot post IDs from the background snapshot (no inline Reddit call)
+    # Later pages ("load more") only continue the date-ordered DB query
+    fresh_post_ids, snapshot_refreshed_at = hot_list_refresher.get(subreddit)
+    degraded_reason = None
+    if after is not None:
+        fresh_post_ids = []
+    elif fresh_post_ids:
+        print(f"✅ Using {len(fresh_post_ids)} hot post IDs from snapshot for r/{subreddit} (refreshed {snapshot_refreshed_at.isoformat()}).")
+        if reddit_breaker.state != "closed":
+            degraded_reason = "circuit_open"
+        elif (datetime.now(timezone.utc) - snapshot_refreshed_at).total_seconds() > REDDIT_SNAPSHOT_MAX_AGE:
+            degraded_reason = "stale_snapshot"
+    else:
+        print(f"⚠️ No hot list snapshot yet for r/{subreddit}")
+        degraded_reason = "no_snapshot"
+        # Proceed to fallback
+
+    # Start the fallback query now so it runs alongside the hot-ID lookup.
+    # Hot matches it also returns are dropped when merging.
+    fallback_query_criteria = {
+        "subreddit": subreddit,
+        # Add minimum score threshold for fallback results
+        "score": {"$gt": 20}
+    }
+    if after:
+        fallback_query_criteria.update(after)
+    fallback_future = search_executor.submit(
+        find_latest, reddit_collection, fallback_query_criteria, projection, MIN_POSTS
+    )
 
     processed_posts = []
     found_reddit_post_ids = set() # Track the original Reddit post_id string
 
-    # Step 2: Query DB for posts matching the fetched PRAW post IDs
+    # Step 2: Query DB for posts matching the snapshot post IDs
     if fresh_post_ids:
         print(f"🔍 Querying DB for matches to {len(fresh_post_ids)} hot post IDs...")
         try:
             # Match based on the Reddit 'post_id' stored in the DB
-            results_cursor = reddit_collection.find({"post_id": {"$in": fresh_post_ids}})
-            # Sort initial matches by date here (optional, but can be slightly clearer)
+            results_cursor = reddit_collection.find({"post_id": {"$in": fresh_post_ids}}, projection)
             initial_posts = [serialize_doc(doc) for doc in results_cursor.sort("publishDate", -1)]
 
             for post in initial_posts:
-                if post and post.get('id'): # Check if serialization worked
-                    # Store the original Reddit post_id for the $nin filter in fallback
-                    original_post_id = next((p['post_id'] for p in fresh_posts_info if post.get('id') == str(p.get('_id'))), None) # Re-find original id - slightly inefficient but safer if serialize_doc modified dict
-                    # A better approach would be to ensure serialize_doc doesn't remove post_id OR pass post_id along
-                    if original_post_id and original_post_id not in found_reddit_post_ids:
-                         processed_posts.append(post)
-                         found_reddit_post_ids.add(original_post_id)
-                    elif not original_post_id and 'post_id' in post and post['post_id'] not in found_reddit_post_ids: # Fallback if post_id survived serialization
-                        print(f"⚠️ Using post_id found directly in serialized doc for {post.get('id')}")
-                        processed_posts.append(post)
-                        found_reddit_post_ids.add(post['post_id'])
-                    elif post.get('id'): # Only add if valid post and not already added
-                        if post.get('id') not in [p.get('id') for p in processed_posts]: # Avoid duplicates by DB id if post_id missing
-                             # This condition means we found the post by ID but couldn't track its original reddit post_id
-                             print(f"⚠️ Warning: Could not reliably track original Reddit post_id for DB record {post.get('id')}. Adding post but fallback might refetch.")
-                             processed_posts.append(post)
+                # post_id survives serialize_doc, so use it to track what we already have
+                if post and post.get('post_id') not in found_reddit_post_ids:
+                    processed_posts.append(post)
+                    found_reddit_post_ids.add(post.get('post_id'))
 
+            # Only a page's worth of hot matches is shown; later pages leave them out
+            processed_posts = processed_posts[:MIN_POSTS]
+            found_reddit_post_ids = {post.get('post_id') for post in processed_posts}
+            exclude = sorted(found_reddit_post_ids)
 
             print(f"✅ Found {len(processed_posts)} posts in DB matching hot IDs.")
 
@@ -230,43 +477,106 @@ def search_reddit():
             print(f"❌ Database error querying reddit_collection for fresh post_ids: {e}")
             # Allow fallback
 
-    # Step 3: Fallback Query if not enough posts found
+    # Step 3: Merge in fallback results if not enough posts found.
+    # The next page continues the fallback query just past the last fallback post looked at.
     num_found = len(processed_posts)
+    next_cursor = encode_cursor(None, exclude) if num_found >= MIN_POSTS else None
     if num_found < MIN_POSTS:
         needed = MIN_POSTS - num_found
-        print(f"⚠️ Only found {num_found} matching fresh posts. Performing fallback query for {needed} more...")
+        print(f"⚠️ Only found {num_found} matching fresh posts. Adding up to {needed} from fallback query...")
 
         try:
-            fallback_query_criteria = {
-                "subreddit": subreddit,
-                # Exclude posts we already found via the PRAW ID match, using original Reddit IDs
-                "post_id": {"$nin": list(found_reddit_post_ids)},
-                # Add minimum score threshold for fallback results
-                "score": {"$gt": 20}
-            }
-            # Find other posts from the same subreddit, sorted by date, excluding ones we already have
-            fallback_cursor = reddit_collection.find(fallback_query_criteria).sort("publishDate", -1).limit(needed)
-            fallback_posts = [serialize_doc(doc) for doc in fallback_cursor]
-
-            # Extend the list with fallback results (no need to check uniqueness against found_reddit_post_ids due to $nin)
-            processed_posts.extend(fallback_posts)
-
-            print(f"✅ Added {len(fallback_posts)} posts from fallback query.")
-
+            fallback_posts = fallback_future.result(timeout=remaining_budget(started))
+
+            # Add other posts from the same subreddit, newest first, excluding ones we already have
+            added = 0
+            last_seen = None
+            for post in fallback_posts:
+                if added >= needed:
+                    break
+                last_seen = post
+                if post and post.get('post_id') not in found_reddit_post_ids:
+                    processed_posts.append(post)
+                    found_reddit_post_ids.add(post.get('post_id'))
+                    added += 1
+
+            # A short fallback page walked to the end means there is nothing more to load
+            if last_seen is not None and (len(fallback_posts) >= MIN_POSTS or last_seen is not fallback_posts[-1]):
+                next_cursor = encode_cursor(last_seen, exclude)
+
+            print(f"✅ Added {added} posts from fallback query.")
+
+        except FutureTimeoutError:
+            fallback_future.cancel()
+            print(f"⏱️ Fallback query for r/{subreddit} exceeded the search deadline; returning hot matches only.")
         except Exception as e:
             print(f"❌ Database error during fallback query for r/{subreddit}: {e}")
             # Proceed with potentially fewer posts
+    else:
+        fallback_future.cancel()
 
     # Step 4: Final Sort and Return
     try:
         # Sort all collected posts (hot matches + fallback) by publish date descending
-        processed_posts.sort(key=lambda x: x.get("publishDate", ""), reverse=True)
+        processed_posts.sort(key=result_sort_key, reverse=True)
         print(f"✅ Returning total {len(processed_posts)} posts for r/{subreddit}.")
-        return jsonify(processed_posts)
+        response = with_result_status(paged_response(processed_posts, next_cursor), degraded_reason)
+        # Freshness of the hot list the results were matched against
+        if snapshot_refreshed_at:
+            response.headers["X-Snapshot-Refreshed-At"] = snapshot_refreshed_at.isoformat().replace("+00:00", "Z")
+        return response
     except Exception as e:
         print(f"❌ Error during final processing/sorting for r/{subreddit}: {e}")
         return jsonify({"error": "Failed during final processing"}), 500
 
+@app.route('/api/news/<doc_id>')
+def get_news_article(doc_id):
+    """Full article document (including content) for a card returned by /api/news/search."""
+    return detail_response(news_collection, doc_id)
+
+
+@app.route('/api/reddit/<doc_id>')
+def get_reddit_post(doc_id):
+    """Full post document (including selftext) for a card returned by /api/reddit/search."""
+    return detail_response(reddit_collection, doc_id)
+
+
+def detail_response(collection, doc_id):
+    if not ObjectId.is_valid(doc_id):
+        return jsonify({"error": "Invalid id"}), 400
+    try:
+        doc = collection.find_one({"_id": ObjectId(doc_id)})
+    except Exception as e:
+        print(f"❌ Database error fetching {doc_id} from {collection.name}: {e}")
+        return jsonify({"error": "Database error"}), 500
+    if doc is None:
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(serialize_doc(doc))
+
+@app.route('/api/ready')
+def readiness_check():
+    """Readiness probe: 200 once MongoDB answers. Upstream clients load lazily and are reported, not required."""
+    try:
+        client.admin.command('ping')
+        mongo_ok = True
+    except Exception as e:
+        print(f"❌ Readiness check could not reach MongoDB: {e}")
+        mongo_ok = False
+    body = {
+        "ready": mongo_ok,
+        "mongo": mongo_ok,
+        "boot_seconds": round(boot_seconds, 3),
+        "resources": readiness(),
+    }
+    return jsonify(body), 200 if mongo_ok else 503
+
+# Finlight and Reddit clients are otherwise created on the first request that needs them
+if os.getenv("WARM_UP", "0") == "1":
+    threading.Thread(target=warm_up, daemon=True).start()
+
+boot_seconds = time.perf_counter() - boot_started
+print(f"🚀 App ready in {boot_seconds:.2f}s")
+
 # --- Main Execution Block (For local dev via 'flask run') ---
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
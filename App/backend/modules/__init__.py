@@ -3,4 +3,5 @@ This package contains the core functionality modules for the financial analysis
 - sentiment_analyzer.py: Handles sentiment analysis using FinBERT
 - topic_modeler.py: Handles topic modeling
 - text_summarizer.py: Handles text summarization
+- text_normalizer.py: Shared, precompiled text cleaning profiles used by every analyzer
 """ 
\ No newline at end of file
@@ -0,0 +1,125 @@
+import time
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, AutoReconnect
+
+# Server error codes worth resending: elections, shutdowns, network and
+# write conflicts. Anything else (duplicate key 11000, document validation
+# 121, ...) fails the same way every time.
+TRANSIENT_ERROR_CODES = frozenset({
+    6,      # HostUnreachable
+    7,      # HostNotFound
+    89,     # NetworkTimeout
+    91,     # ShutdownInProgress
+    112,    # WriteConflict
+    189,    # PrimarySteppedDown
+    262,    # ExceededTimeLimit
+    9001,   # SocketException
+    10107,  # NotWritablePrimary
+    11600,  # InterruptedAtShutdown
+    11602,  # InterruptedDueToReplStateChange
+    13435,  # NotPrimaryNoSecondaryOk
+    13436,  # NotPrimaryOrSecondary
+})
+
+
+class BulkUpserter:
+    """Buffers upserts and writes them with unordered bulk_write calls.
+
+    A flush happens when batch_size operations are buffered, when
+    flush_interval seconds have passed since the last flush, or when flush()
+    is called. Operations that failed with a transient error are retried on
+    their own; operations that succeeded are never resent. Filters of the
+    operations that could not be written are kept until pop_failed() is
+    called, so the caller can tell which items were not stored.
+    """
+
+    def __init__(self, collection, batch_size=100, flush_interval=5.0, max_retries=3):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self.pending = []  # (filter_doc, operation)
+        self.failed = []  # filter docs of operations given up on
+        self.last_flush = time.monotonic()
+        self.stats = {"flushes": 0, "written": 0, "failed": 0, "total_latency": 0.0}
+
+    def upsert(self, filter_doc, set_doc, upsert=True):
+        self.pending.append((filter_doc, UpdateOne(filter_doc, {"$set": set_doc}, upsert=upsert)))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes every buffered operation, retrying only the ones that failed transiently.
+
+        Returns:
+            list[dict]: Filters of the operations that could not be written in this flush
+        """
+        if not self.pending:
+            self.last_flush = time.monotonic()
+            return []
+
+        pending, self.pending = self.pending, []
+        start = time.monotonic()
+        failed = []
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.collection.bulk_write([op for _, op in pending], ordered=False)
+                self.stats["written"] += len(pending)
+                pending = []
+                break
+            except BulkWriteError as e:
+                errors = {error["index"]: error.get("code") for error in e.details.get("writeErrors", [])}
+                self.stats["written"] += len(pending) - len(errors)
+                for i, code in errors.items():
+                    if code not in TRANSIENT_ERROR_CODES:
+                        print(f"❌ Not retrying write for {pending[i][0]}: error {code}.")
+                        failed.append(pending[i][0])
+                pending = [pending[i] for i, code in errors.items() if code in TRANSIENT_ERROR_CODES]
+                if pending:
+                    print(f"⚠️ Bulk write attempt {attempt + 1}: {len(pending)} operations failed transiently.")
+            except AutoReconnect as e:
+                print(f"⚠️ Bulk write attempt {attempt + 1} lost the connection: {e}")
+
+            if not pending:
+                break
+            if attempt < self.max_retries:
+                time.sleep(0.5 * 2 ** attempt)
+
+        if pending:
+            print(f"❌ Giving up on {len(pending)} operations after {self.max_retries} retries.")
+            failed.extend(filter_doc for filter_doc, _ in pending)
+
+        self.failed.extend(failed)
+        self.stats["failed"] += len(failed)
+        latency = time.monotonic() - start
+        self.stats["flushes"] += 1
+        self.stats["total_latency"] += latency
+        self.last_flush = time.monotonic()
+        print(f"✅ Flush {self.stats['flushes']} wrote {self.stats['written']} documents so far ({latency * 1000:.0f} ms).")
+        return failed
+
+    def pop_failed(self):
+        """Returns and clears the filters of every write given up on since the last call."""
+        failed, self.failed = self.failed, []
+        return failed
+
+    def reset(self):
+        """Discards buffered operations and failed filters, e.g. those of a batch that was aborted.
+
+        Returns:
+            int: Number of buffered operations dropped without being written
+        """
+        dropped = len(self.pending)
+        self.pending = []
+        self.failed = []
+        return dropped
+
+    def report(self):
+        flushes = self.stats["flushes"]
+        avg_ms = self.stats["total_latency"] / flushes * 1000 if flushes else 0.0
+        print(
+            f"Bulk writes: {flushes} flushes, {self.stats['written']} written, "
+            f"{self.stats['failed']} failed, {avg_ms:.0f} ms average flush latency."
+        )
@@ -0,0 +1,128 @@
+import time
+import threading
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while its circuit is open."""
+
+
+class _CallOutcome:
+    """Makes sure a call is recorded once, by whichever of the call or its overrun timer settles first."""
+
+    def __init__(self):
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def settle(self):
+        """Returns True for the first caller only."""
+        with self._lock:
+            if self._settled:
+                return False
+            self._settled = True
+            return True
+
+
+class CircuitBreaker:
+    """Stops calling a failing upstream for a cool-down period.
+
+    After failure_threshold consecutive failures the circuit opens and every
+    call fails fast with CircuitOpenError. Once cooldown seconds have passed a
+    single trial call is let through (half-open): success closes the circuit,
+    failure opens it for another cool-down. Calls slower than
+    slow_call_seconds count as failures even if they eventually succeed, so an
+    upstream that keeps blowing the request budget trips the breaker too. The
+    failure is recorded as soon as the call overruns, not when it returns, so
+    callers that stopped waiting on a hung call stop sending new ones.
+    """
+
+    def __init__(self, name, failure_threshold=3, cooldown=60, slow_call_seconds=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_call_seconds = slow_call_seconds
+
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return self._state
+
+    def allow(self):
+        """Returns True if a call may go through now. A True in half-open reserves the trial call."""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = "half_open"
+            if self._state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self.stats["opened"] += 1
+                    print(f"⚠️ Circuit '{self.name}' opened after {self._failures} failures; "
+                          f"skipping upstream for {self.cooldown}s.")
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        """Calls fn through the breaker. Raises CircuitOpenError without calling fn while open."""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        with self._lock:
+            self.stats["calls"] += 1
+
+        start = time.monotonic()
+        outcome = _CallOutcome()
+        timer = None
+        if self.slow_call_seconds is not None:
+            timer = threading.Timer(self.slow_call_seconds, self._overran, args=(outcome,))
+            timer.daemon = True
+            timer.start()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            if outcome.settle():
+                self.record_failure()
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if outcome.settle():
+            if self.slow_call_seconds is not None and time.monotonic() - start > self.slow_call_seconds:
+                self.record_failure()
+            else:
+                self.record_success()
+        return result
+
+    def _overran(self, outcome):
+        if outcome.settle():
+            print(f"⏱️ Call through circuit '{self.name}' overran {self.slow_call_seconds}s; counting it as failed.")
+            self.record_failure()
+
+    def snapshot(self):
+        state = self.state
+        with self._lock:
+            return {**self.stats, "state": state, "consecutive_failures": self._failures}
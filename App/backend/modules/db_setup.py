@@ -0,0 +1,121 @@
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import OperationFailure
+
+
+def entity_keys(ner_results):
+    """Normalized, lowercased lookup keys for a document's entities.
+
+    Each entity contributes its full text and its individual words, so a
+    search for "tesla" still matches an entity like "Tesla Inc" through an
+    exact (indexable) match instead of an unanchored regex.
+    """
+    keys = set()
+    for entity in ner_results or []:
+        text = " ".join(str(entity.get("text", "")).lower().split())
+        if not text:
+            continue
+        keys.add(text)
+        keys.update(word.strip(".,'\"()") for word in text.split())
+    keys.discard("")
+    return sorted(keys)
+
+
+INDEXES = {
+    "news_data": [
+        ([("post_id", ASCENDING)], {"unique": True, "name": "post_id_unique"}),
+        # _id breaks publishDate ties so keyset pagination stays index-backed
+        ([("ner_keys", ASCENDING), ("publishDate", DESCENDING), ("_id", DESCENDING)],
+         {"name": "ner_keys_publishDate_id"}),
+    ],
+    "reddit_data": [
+        ([("post_id", ASCENDING)], {"unique": True, "name": "post_id_unique"}),
+        ([("subreddit", ASCENDING), ("publishDate", DESCENDING), ("_id", DESCENDING), ("score", DESCENDING)],
+         {"name": "subreddit_publishDate_id_score"}),
+    ],
+    # Items whose analysis came out empty (see modules/dedup.py)
+    "news_data_skipped": [
+        ([("post_id", ASCENDING)], {"unique": True, "name": "post_id_unique"}),
+    ],
+    "reddit_data_skipped": [
+        ([("post_id", ASCENDING)], {"unique": True, "name": "post_id_unique"}),
+    ],
+}
+
+# Replaced by the _id-suffixed keyset pagination indexes above
+RETIRED_INDEXES = {
+    "news_data": ["ner_keys_publishDate"],
+    "reddit_data": ["subreddit_publishDate_score"],
+}
+
+
+def ensure_indexes(db):
+    """Creates the search and dedup indexes if they are missing and drops retired ones.
+
+    Safe to call on every startup.
+    """
+    for collection_name, index_names in RETIRED_INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                collection.drop_index(index_name)
+                print(f"Dropped retired index {index_name} on {collection_name}.")
+
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        for keys, options in indexes:
+            try:
+                collection.create_index(keys, **options)
+            except OperationFailure as e:
+                # e.g. existing duplicate post_ids block the unique index; search still works without it
+                print(f"⚠️ Could not create index {options['name']} on {collection_name}: {e}")
+
+
+def backfill_ner_keys(collection, batch_size=500):
+    """Adds ner_keys to documents stored before the field existed. Returns the number updated."""
+    updated = 0
+    ops = []
+    cursor = collection.find({"ner_keys": {"$exists": False}}, {"ner_results": 1})
+    for doc in cursor:
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"ner_keys": entity_keys(doc.get("ner_results"))}}))
+        if len(ops) >= batch_size:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def explain_search_queries(db, sample_query="tesla", sample_subreddit="stocks"):
+    """Explains the search fallback queries and reports whether each one uses an index.
+
+    Returns:
+        dict: {query_name: {"stages": [...], "uses_index": bool}}
+    """
+    checks = {
+        "news_fallback": db["news_data"].find({"ner_keys": sample_query, "canonical_id": None}).sort(
+            [("publishDate", DESCENDING), ("_id", DESCENDING)]
+        ).limit(10),
+        "news_fresh_links": db["news_data"].find({"post_id": {"$in": ["https://example.com"]}}),
+        "reddit_fallback": db["reddit_data"].find(
+            {"subreddit": sample_subreddit, "score": {"$gt": 20}}
+        ).sort([("publishDate", DESCENDING), ("_id", DESCENDING)]).limit(15),
+        "reddit_hot_ids": db["reddit_data"].find({"post_id": {"$in": ["abc123"]}}),
+    }
+
+    report = {}
+    for name, cursor in checks.items():
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        # Newer servers nest the classic plan under queryPlan
+        stages = _plan_stages(winning_plan.get("queryPlan", winning_plan))
+        report[name] = {"stages": stages, "uses_index": "IXSCAN" in stages and "COLLSCAN" not in stages}
+    return report
@@ -0,0 +1,110 @@
+import hashlib
+from datetime import datetime
+from pymongo import UpdateOne
+
+
+def content_hash(title, body):
+    """Stable fingerprint of the text the models see for one item."""
+    payload = f"{title or ''}\n{body or ''}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def skipped_collection(collection):
+    """Marker collection for items whose analysis came out empty (news_data -> news_data_skipped).
+
+    Kept apart from the results so search never sees the markers.
+    """
+    return collection.database[f"{collection.name}_skipped"]
+
+
+def mark_empty_results(collection, post_ids, content_hashes, reason="empty_summary"):
+    """Records items that produced no storable result, so unchanged copies are not analysed again."""
+    if not post_ids:
+        return
+    now = datetime.now()
+    skipped_collection(collection).bulk_write([
+        UpdateOne(
+            {"post_id": post_id},
+            {"$set": {"post_id": post_id, "content_hash": content_hash, "reason": reason, "skipped_at": now}},
+            upsert=True
+        )
+        for post_id, content_hash in zip(post_ids, content_hashes)
+    ], ordered=False)
+
+
+def _stored_hashes(collection, post_ids):
+    cursor = collection.find(
+        {"post_id": {"$in": post_ids}},
+        {"post_id": 1, "content_hash": 1, "_id": 0}
+    )
+    return {doc["post_id"]: doc.get("content_hash") for doc in cursor}
+
+
+def filter_unprocessed(collection, items, id_key, body_key, force=False):
+    """Drop items that are already stored, or recorded as empty, with identical title and body.
+
+    Uses one bulk $in lookup on post_id per collection for the whole batch.
+    Items queued more than once in the same batch are only kept once.
+
+    Args:
+        collection (Collection): MongoDB collection holding processed results
+        items (list[dict]): Queued items
+        id_key (str): Item field stored as post_id in the collection
+        body_key (str): Item field holding the body text
+        force (bool, optional): Keep every item regardless of what is stored
+
+    Returns:
+        tuple[list[dict], list[str]]: Items to process and their content hashes
+    """
+    unique_items = {}
+    for item in items:
+        unique_items.setdefault(item[id_key], item)
+
+    hashes = {
+        post_id: content_hash(item["title"], item[body_key])
+        for post_id, item in unique_items.items()
+    }
+
+    stored_hashes, empty_hashes = {}, {}
+    if not force and unique_items:
+        stored_hashes = _stored_hashes(collection, list(unique_items))
+        empty_hashes = _stored_hashes(skipped_collection(collection), list(unique_items))
+
+    to_process = [
+        (item, hashes[post_id])
+        for post_id, item in unique_items.items()
+        if force or hashes[post_id] not in (stored_hashes.get(post_id), empty_hashes.get(post_id))
+    ]
+
+    skipped = len(items) - len(to_process)
+    if skipped:
+        print(f"Skipping {skipped} already-processed or duplicate items.")
+
+    return [item for item, _ in to_process], [h for _, h in to_process]
+
+
+def refresh_unchanged(writer, items, processed, id_key, fields):
+    """Queues a $set of the volatile fields for items filter_unprocessed skipped.
+
+    The analysis of an unchanged item is kept, but counters such as a post's
+    score keep moving between fetches. Only documents that already exist are
+    updated; items skipped as empty or as in-batch duplicates match nothing.
+
+    Args:
+        writer (BulkUpserter): Writer the updates are queued on
+        items (list[dict]): Queued items, as passed to filter_unprocessed
+        processed (list[dict]): Items filter_unprocessed kept
+        id_key (str): Item field stored as post_id in the collection
+        fields (tuple[str]): Item fields copied onto the stored document
+    """
+    kept = {item[id_key] for item in processed}
+    now = datetime.now()
+    refreshed = set()
+    for item in items:
+        post_id = item[id_key]
+        if post_id in kept or post_id in refreshed:
+            continue
+        refreshed.add(post_id)
+        set_doc = {field: item[field] for field in fields if field in item}
+        set_doc["processed_at"] = now
+        writer.upsert({"post_id": post_id}, set_doc, upsert=False)
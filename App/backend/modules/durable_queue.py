@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_QUEUE_PATH = os.getenv("QUEUE_DB_PATH", os.path.join(BACKEND_DIR, "data", "work_queue.db"))
+
+
+class DurableQueue:
+    """SQLite-backed work queue that survives crashes and deploys.
+
+    Items are JSON payloads. get()/get_many() claim items for
+    visibility_timeout seconds; a claimed item that is neither acked nor
+    nacked in time becomes visible to consumers again. Items that fail
+    max_attempts times are moved to the dead-letter table instead of being
+    retried forever. Several processes on the same box can share one file.
+    """
+
+    def __init__(self, name, path=DEFAULT_QUEUE_PATH, visibility_timeout=600, max_attempts=3, retry_delay=60):
+        self.name = name
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS queue_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    visible_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_visible ON queue_items (queue, visible_at, id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    id INTEGER PRIMARY KEY,
+                    queue TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    last_error TEXT,
+                    failed_at REAL NOT NULL
+                )
+            """)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._connection())
+
+    def put(self, item):
+        self.put_many([item])
+
+    def put_many(self, items):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO queue_items (queue, payload, visible_at, created_at) VALUES (?, ?, ?, ?)",
+                [(self.name, json.dumps(item, default=str), now, now) for item in items]
+            )
+
+    def get(self):
+        """Claims the oldest visible item. Returns (item_id, item) or None if nothing is visible."""
+        claimed = self.get_many(1)
+        return claimed[0] if claimed else None
+
+    def get_many(self, n):
+        """Claims up to n visible items in FIFO order.
+
+        Returns:
+            list[tuple[int, dict]]: (item_id, item) pairs; ack or nack each item_id when done
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, payload, attempts, last_error FROM queue_items "
+                "WHERE queue = ? AND visible_at <= ? ORDER BY id LIMIT ?",
+                (self.name, now, n)
+            ).fetchall()
+
+            claimed = []
+            for item_id, payload, attempts, last_error in rows:
+                # Claimed max_attempts times without an ack: the consumer keeps dying on it
+                if attempts >= self.max_attempts:
+                    self._dead_letter(conn, item_id, payload, attempts, last_error or "visibility timeout expired")
+                    continue
+                conn.execute(
+                    "UPDATE queue_items SET attempts = attempts + 1, visible_at = ? WHERE id = ?",
+                    (now + self.visibility_timeout, item_id)
+                )
+                claimed.append((item_id, json.loads(payload)))
+        return claimed
+
+    def ack(self, item_id):
+        self.ack_many([item_id])
+
+    def ack_many(self, item_ids):
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM queue_items WHERE id = ?", [(item_id,) for item_id in item_ids])
+
+    def nack(self, item_id, error=None):
+        """Releases a failed item for a later retry, or dead-letters it once out of attempts."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT payload, attempts FROM queue_items WHERE id = ?", (item_id,)
+            ).fetchone()
+            if row is None:
+                return
+            payload, attempts = row
+            if attempts >= self.max_attempts:
+                self._dead_letter(conn, item_id, payload, attempts, error)
+            else:
+                conn.execute(
+                    "UPDATE queue_items SET visible_at = ?, last_error = ? WHERE id = ?",
+                    (time.time() + self.retry_delay, error, item_id)
+                )
+
+    def _dead_letter(self, conn, item_id, payload, attempts, error):
+        print(f"⚠️ Moving item {item_id} from queue '{self.name}' to dead letters after {attempts} attempts.")
+        conn.execute(
+            "INSERT INTO dead_letters (id, queue, payload, attempts, last_error, failed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (item_id, self.name, payload, attempts, error, time.time())
+        )
+        conn.execute("DELETE FROM queue_items WHERE id = ?", (item_id,))
+
+    def dead_letters(self):
+        rows = self._connection().execute(
+            "SELECT id, payload, attempts, last_error FROM dead_letters WHERE queue = ? ORDER BY id",
+            (self.name,)
+        ).fetchall()
+        return [
+            {"id": item_id, "item": json.loads(payload), "attempts": attempts, "last_error": last_error}
+            for item_id, payload, attempts, last_error in rows
+        ]
+
+    def requeue_dead_letters(self):
+        """Moves every dead-lettered item back onto the queue with a fresh attempt count."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO queue_items (queue, payload, visible_at, created_at) "
+                "SELECT queue, payload, ?, ? FROM dead_letters WHERE queue = ?",
+                (now, now, self.name)
+            )
+            conn.execute("DELETE FROM dead_letters WHERE queue = ?", (self.name,))
+
+    def qsize(self):
+        """Number of items waiting or in flight (not counting dead letters)."""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM queue_items WHERE queue = ?", (self.name,)
+        ).fetchone()[0]
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def close(self):
+        """Closes the calling thread's connection; the next call on this thread opens a new one."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _ImmediateTransaction:
+    """Takes the SQLite write lock up front so concurrent claimers never race."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
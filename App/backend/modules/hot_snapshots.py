@@ -0,0 +1,67 @@
+import random
+import threading
+from datetime import datetime, timezone
+
+
+class HotListRefresher:
+    """Keeps an in-memory snapshot of hot post IDs per subreddit, refreshed in the background.
+
+    Request handlers read the latest snapshot instead of calling Reddit
+    inline, so their latency no longer depends on Reddit. A failed refresh
+    keeps the previous snapshot for that subreddit. With a circuit breaker,
+    refreshes are skipped while Reddit keeps failing.
+    """
+
+    def __init__(self, subreddits, fetch_fn, posts=20, interval=300, jitter=0.2, breaker=None):
+        self.subreddits = list(subreddits)
+        self.fetch_fn = fetch_fn
+        self.posts = posts
+        self.interval = interval
+        self.jitter = jitter
+        self.breaker = breaker
+
+        self._snapshots = {}  # subreddit -> (post_ids, refreshed_at)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, subreddit):
+        """Returns (post_ids, refreshed_at) for a subreddit, or ([], None) before the first refresh."""
+        with self._lock:
+            return self._snapshots.get(subreddit, ([], None))
+
+    def refresh(self, subreddit):
+        if self.breaker is not None:
+            fresh_posts_info = self.breaker.call(self._fetch, subreddit)
+        else:
+            fresh_posts_info = self._fetch(subreddit)
+        post_ids = list(dict.fromkeys(post['post_id'] for post in fresh_posts_info if 'post_id' in post))
+        with self._lock:
+            self._snapshots[subreddit] = (post_ids, datetime.now(timezone.utc))
+
+    def _fetch(self, subreddit):
+        fresh_posts_info = self.fetch_fn(subreddit=subreddit, posts=self.posts)
+        if not fresh_posts_info:
+            # The fetcher swallows its own errors, so an empty hot list is how a failure shows up
+            raise RuntimeError("hot list came back empty")
+        return fresh_posts_info
+
+    def _run(self):
+        while not self._stop.is_set():
+            for subreddit in self.subreddits:
+                try:
+                    self.refresh(subreddit)
+                except Exception as e:
+                    print(f"❌ Hot list refresh failed for r/{subreddit}, keeping previous snapshot: {e}")
+            # Jitter keeps several app processes from hitting Reddit in lockstep
+            delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._stop.wait(delay)
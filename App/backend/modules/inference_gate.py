@@ -0,0 +1,74 @@
+import os
+from collections import Counter, OrderedDict
+from modules.text_normalizer import as_document
+
+REMOVED_BODIES = {"[deleted]", "[removed]"}
+
+
+class InferenceGate:
+    """Cheap pre-inference checks so empty or low-value items never reach a model.
+
+    An item is skipped when its body was deleted or removed, when its cleaned
+    body is shorter than min_chars (link-only and image-only posts), or, with
+    dedupe_titles, when another item with the same title but a different id
+    was already seen (syndicated news copies). Skip reasons are counted per
+    reason.
+    """
+
+    def __init__(self, min_chars=None, profile="summarizer", dedupe_titles=True, max_titles=10000):
+        self.min_chars = min_chars if min_chars is not None else int(os.getenv("GATE_MIN_CHARS", 40))
+        self.profile = profile
+        self.dedupe_titles = dedupe_titles
+        self.max_titles = max_titles
+
+        self.counts = Counter()
+        self._titles = OrderedDict()  # normalized title -> id of the first item seen with it
+
+    def check(self, item_id, title, body):
+        """Returns the skip reason for one item, or None if it should be processed.
+
+        Args:
+            item_id (str): The item's post_id, so re-processing the same item is not a duplicate
+            title (str): Raw title
+            body (str | NormalizedText): Raw body (cleaning results are cached on a NormalizedText)
+        """
+        document = as_document(body)
+        if document.raw.strip() in REMOVED_BODIES:
+            return "removed_body"
+        if len(document.get(self.profile)) < self.min_chars:
+            return "too_short"
+
+        if self.dedupe_titles:
+            key = " ".join(str(title).lower().split())
+            first_id = self._titles.get(key)
+            if first_id is not None and first_id != item_id:
+                return "duplicate_title"
+            self._titles[key] = item_id
+            self._titles.move_to_end(key)
+            while len(self._titles) > self.max_titles:
+                self._titles.popitem(last=False)
+        return None
+
+    def filter(self, items, id_key, title_key, bodies):
+        """Splits items into the indices to process, counting every skip.
+
+        Returns:
+            list[int]: Indices into items (and bodies) that passed the gate
+        """
+        kept = []
+        for i, (item, body) in enumerate(zip(items, bodies)):
+            reason = self.check(item[id_key], item[title_key], body)
+            if reason:
+                self.skip(reason)
+            else:
+                kept.append(i)
+        self.counts["passed"] += len(kept)
+        return kept
+
+    def skip(self, reason, n=1):
+        self.counts[reason] += n
+
+    def report(self):
+        skipped = {reason: count for reason, count in self.counts.items() if reason != "passed"}
+        print(f"Inference gate: {self.counts['passed']} passed, skipped {sum(skipped.values())} {skipped}")
+        return dict(self.counts)
@@ -0,0 +1,81 @@
+import time
+import threading
+
+# name -> LazyResource, shared by everything in the process
+_resources = {}
+_registry_lock = threading.Lock()
+
+
+class LazyResource:
+    """Builds an expensive object (model, API client) on first use, exactly once.
+
+    get() is thread-safe: concurrent first callers wait for a single factory
+    call. A factory error is not cached, so the next get() tries again.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.load_seconds = None
+        self.error = None
+
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                print(f"⏳ Loading {self.name}...")
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    print(f"❌ Failed to load {self.name}: {e}")
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self._loaded = True
+                print(f"✅ Loaded {self.name} in {self.load_seconds:.2f}s")
+        return self._value
+
+    def status(self):
+        return {"loaded": self._loaded, "load_seconds": self.load_seconds, "error": self.error}
+
+
+def lazy_resource(name, factory):
+    """Returns the process-wide LazyResource for name, registering it on first use.
+
+    Modules that need the same model (e.g. both workers in one scheduler
+    process) share a single instance by using the same name.
+    """
+    with _registry_lock:
+        if name not in _resources:
+            _resources[name] = LazyResource(name, factory)
+        return _resources[name]
+
+
+def readiness(names=None):
+    """{name: status} for the registered resources (all of them by default)."""
+    with _registry_lock:
+        resources = [r for n, r in _resources.items() if names is None or n in names]
+    return {resource.name: resource.status() for resource in resources}
+
+
+def warm_up(names=None):
+    """Loads registered resources up front instead of on first use. Errors are logged, not raised."""
+    with _registry_lock:
+        resources = [r for n, r in _resources.items() if names is None or n in names]
+    for resource in resources:
+        try:
+            resource.get()
+        except Exception:
+            pass  # Already logged; the resource retries on its next get()
+    return readiness(names)
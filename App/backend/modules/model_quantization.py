@@ -0,0 +1,26 @@
+import os
+import io
+import torch
+
+
+def quantization_requested(quantize=None):
+    """Explicit flag if given, otherwise QUANTIZE_MODELS=1 opts every model in."""
+    if quantize is None:
+        return os.getenv("QUANTIZE_MODELS", "0") == "1"
+    return bool(quantize)
+
+
+def quantize_linear_layers(model):
+    """Applies dynamic int8 quantization to the model's Linear layers (CPU inference only).
+
+    Weights are stored as int8 and activations are quantized on the fly, so
+    no calibration data is needed. Embeddings and layer norms stay fp32.
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def model_size_mb(model):
+    """Serialized size of the model's weights, a stable proxy for its in-memory footprint."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / (1024 * 1024)
@@ -0,0 +1,245 @@
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from pymongo import MongoClient, ReturnDocument, ASCENDING
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class MongoJobQueue:
+    """Leased job queue in the financial_data database, shared by any number of worker nodes.
+
+    Fetchers insert pending jobs; workers claim them one document at a time
+    with find_one_and_update, which sets a lease owner and expiry atomically.
+    Held leases are renewed by a background heartbeat until the job is acked,
+    nacked or released; the heartbeat ends once no lease is held and starts
+    again with the next claim. close() releases whatever is still held. A lease that expires (the worker died) makes the job
+    claimable again. Exposes the same interface as DurableQueue so workers do
+    not care which backend they run on.
+    """
+
+    def __init__(self, name, mongo_uri=None, lease_seconds=300, max_attempts=3, retry_delay=60, worker_id=None):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+        client = MongoClient(mongo_uri or os.getenv("MONGO_URI"))
+        db = client["financial_data"]
+        self.jobs = db["jobs"]
+        self.worker_stats = db["worker_stats"]
+        self.jobs.create_index([("queue", ASCENDING), ("status", ASCENDING), ("visible_at", ASCENDING)])
+        self.jobs.create_index([("queue", ASCENDING), ("status", ASCENDING), ("lease_expires", ASCENDING)])
+
+        self._held = {}  # job _id -> claim time
+        self._counted_until = None  # end of the busy time already added to worker_stats
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        self._stop = threading.Event()
+
+    def put(self, item):
+        self.put_many([item])
+
+    def put_many(self, items):
+        now = _now()
+        if items:
+            self.jobs.insert_many([
+                {
+                    "queue": self.name,
+                    "payload": item,
+                    "status": "pending",
+                    "attempts": 0,
+                    "visible_at": now,
+                    "created_at": now,
+                }
+                for item in items
+            ], ordered=False)
+
+    def get(self):
+        claimed = self.get_many(1)
+        return claimed[0] if claimed else None
+
+    def get_many(self, n):
+        """Claims up to n jobs, reclaiming any whose lease has expired.
+
+        Returns:
+            list[tuple[ObjectId, dict]]: (job_id, item) pairs; ack or nack each job_id when done
+        """
+        claimed = []
+        while len(claimed) < n:
+            now = _now()
+            job = self.jobs.find_one_and_update(
+                {
+                    "queue": self.name,
+                    "$or": [
+                        {"status": "pending", "visible_at": {"$lte": now}},
+                        {"status": "leased", "lease_expires": {"$lte": now}},
+                    ],
+                },
+                {
+                    "$set": {
+                        "status": "leased",
+                        "lease_owner": self.worker_id,
+                        "lease_expires": now + timedelta(seconds=self.lease_seconds),
+                    },
+                    "$inc": {"attempts": 1},
+                },
+                sort=[("_id", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if job is None:
+                break
+
+            # Claimed more than max_attempts times: earlier holders kept dying on it
+            if job["attempts"] > self.max_attempts:
+                self._dead_letter(job["_id"], job.get("last_error") or "lease expired")
+                continue
+
+            with self._lock:
+                self._held[job["_id"]] = now
+            claimed.append((job["_id"], job["payload"]))
+
+        if claimed:
+            self._start_heartbeat()
+        return claimed
+
+    def renew(self, job_ids=None):
+        """Extends the leases this worker holds (all of them by default)."""
+        with self._lock:
+            job_ids = list(self._held) if job_ids is None else list(job_ids)
+        if job_ids:
+            self.jobs.update_many(
+                {"_id": {"$in": job_ids}, "lease_owner": self.worker_id, "status": "leased"},
+                {"$set": {"lease_expires": _now() + timedelta(seconds=self.lease_seconds)}},
+            )
+
+    def release(self, job_ids):
+        """Hands jobs back without counting the attempt, e.g. on graceful shutdown."""
+        job_ids = list(job_ids)
+        self.jobs.update_many(
+            {"_id": {"$in": job_ids}, "lease_owner": self.worker_id, "status": "leased"},
+            {"$set": {"status": "pending", "visible_at": _now()}, "$inc": {"attempts": -1},
+             "$unset": {"lease_owner": "", "lease_expires": ""}},
+        )
+        self._forget(job_ids)
+
+    def ack(self, job_id):
+        self.ack_many([job_id])
+
+    def ack_many(self, job_ids):
+        job_ids = list(job_ids)
+        self.jobs.delete_many({"_id": {"$in": job_ids}, "lease_owner": self.worker_id})
+        claimed_at = self._forget(job_ids)
+        if claimed_at:
+            # Jobs claimed together and acked one by one share their busy time; count it once
+            now = _now()
+            with self._lock:
+                start = min(claimed_at)
+                if self._counted_until is not None:
+                    start = max(start, self._counted_until)
+                self._counted_until = now
+            busy_seconds = max(0.0, (now - start).total_seconds())
+            self.worker_stats.update_one(
+                {"worker_id": self.worker_id, "queue": self.name},
+                {
+                    "$inc": {"processed": len(job_ids), "batches": 1, "busy_seconds": busy_seconds},
+                    "$set": {"last_seen": now},
+                },
+                upsert=True,
+            )
+
+    def nack(self, job_id, error=None):
+        job = self.jobs.find_one({"_id": job_id, "lease_owner": self.worker_id}, {"attempts": 1})
+        self._forget([job_id])
+        if job is None:
+            return
+        if job["attempts"] >= self.max_attempts:
+            self._dead_letter(job_id, error)
+        else:
+            self.jobs.update_one(
+                {"_id": job_id, "lease_owner": self.worker_id},
+                {"$set": {"status": "pending", "visible_at": _now() + timedelta(seconds=self.retry_delay),
+                          "last_error": error},
+                 "$unset": {"lease_owner": "", "lease_expires": ""}},
+            )
+
+    def _dead_letter(self, job_id, error):
+        print(f"⚠️ Moving job {job_id} from queue '{self.name}' to dead letters.")
+        self.jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "dead", "last_error": error, "failed_at": _now()},
+             "$unset": {"lease_owner": "", "lease_expires": ""}},
+        )
+
+    def dead_letters(self):
+        return [
+            {"id": job["_id"], "item": job["payload"], "attempts": job["attempts"], "last_error": job.get("last_error")}
+            for job in self.jobs.find({"queue": self.name, "status": "dead"}).sort("_id", ASCENDING)
+        ]
+
+    def requeue_dead_letters(self):
+        self.jobs.update_many(
+            {"queue": self.name, "status": "dead"},
+            {"$set": {"status": "pending", "attempts": 0, "visible_at": _now()}},
+        )
+
+    def qsize(self):
+        """Number of jobs waiting or in flight (not counting dead letters)."""
+        return self.jobs.count_documents({"queue": self.name, "status": {"$in": ["pending", "leased"]}})
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def throughput(self):
+        """Per-worker processed counts and items/sec for this queue."""
+        stats = []
+        for doc in self.worker_stats.find({"queue": self.name}):
+            busy = doc.get("busy_seconds", 0)
+            stats.append({
+                "worker_id": doc["worker_id"],
+                "processed": doc.get("processed", 0),
+                "items_per_sec": round(doc.get("processed", 0) / busy, 3) if busy else 0.0,
+                "last_seen": doc.get("last_seen"),
+            })
+        return stats
+
+    def close(self):
+        """Releases the jobs still held and stops the heartbeat. A later claim starts a new one."""
+        with self._lock:
+            held = list(self._held)
+        if held:
+            self.release(held)
+        self._stop.set()
+        heartbeat = self._heartbeat
+        if heartbeat is not None:
+            heartbeat.join()
+        self._stop.clear()
+
+    def _forget(self, job_ids):
+        with self._lock:
+            return [claimed for claimed in (self._held.pop(job_id, None) for job_id in job_ids) if claimed]
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._renew_loop, daemon=True)
+            self._heartbeat.start()
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                # Nothing left to renew; the next claim starts a new heartbeat
+                if not self._held:
+                    self._heartbeat = None
+                    return
+            try:
+                self.renew()
+            except Exception as e:
+                print(f"⚠️ Lease renewal failed for worker {self.worker_id}: {e}")
+        with self._lock:
+            self._heartbeat = None
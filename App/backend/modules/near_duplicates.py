@@ -0,0 +1,229 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.getenv("NEAR_DUP_INDEX_PATH", os.path.join(BACKEND_DIR, "data", "near_duplicates.db"))
+
+WORD_PATTERN = re.compile(r"\w+")
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text, size=5):
+    """Word n-grams of the lowercased text (the whole text if it is shorter than size words)."""
+    words = WORD_PATTERN.findall(str(text).lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def lsh_bands(num_perm, threshold, recall=0.98):
+    """Picks (bands, rows) so that pairs at the similarity threshold very likely share a band.
+
+    Candidates are verified against the threshold afterwards, so the layout
+    favours recall: the most rows per band (fewest spurious candidates) for
+    which a pair exactly at the threshold still shares a band with
+    probability 1 - (1 - threshold ** rows) ** bands >= recall.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index of recently processed documents, persisted in SQLite.
+
+    Each document is reduced to a MinHash signature over its word shingles;
+    the fraction of equal signature slots estimates the Jaccard similarity
+    of two documents' shingle sets. Signatures are split into bands and a
+    document is a candidate duplicate of every document sharing a band.
+
+    The newest max_docs signatures are kept in memory. The SQLite file keeps
+    them across runs, and each lookup first picks up signatures that other
+    processes added since the last one.
+    """
+
+    def __init__(self, threshold=None, num_perm=128, shingle_size=5, max_docs=None, path=DEFAULT_INDEX_PATH, seed=1):
+        self.threshold = threshold if threshold is not None else float(os.getenv("NEAR_DUP_THRESHOLD", 0.7))
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_docs = max_docs or int(os.getenv("NEAR_DUP_MAX_DOCS", 20000))
+        self.path = path
+        self.bands, self.rows = lsh_bands(num_perm, self.threshold)
+
+        # Fixed seed: signatures stored by earlier runs stay comparable
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+        self._docs = OrderedDict()  # doc_id -> signature, oldest first
+        self._buckets = {}  # (band, band bytes) -> set of doc_ids
+        self._last_rowid = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS signatures (
+                    rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+                    doc_id TEXT NOT NULL UNIQUE,
+                    num_perm INTEGER NOT NULL,
+                    signature BLOB NOT NULL
+                )
+            """)
+        with self._lock:
+            self._sync()
+        print(f"Near-duplicate index: {len(self._docs)} documents, {self.bands} bands x {self.rows} rows, "
+              f"threshold {self.threshold}")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def signature(self, text):
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+             for shingle in shingles(text, self.shingle_size)],
+            dtype=np.uint64
+        )
+        # Universal hashing (a * x + b) mod p with a, b, x < 2**32 cannot overflow 64 bits
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def similarity(self, signature, other):
+        """Estimated Jaccard similarity of two documents' shingle sets."""
+        return float(np.mean(signature == other))
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _insert(self, doc_id, signature):
+        self._remove(doc_id)
+        self._docs[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(doc_id)
+        while len(self._docs) > self.max_docs:
+            self._remove(next(iter(self._docs)))
+
+    def _remove(self, doc_id):
+        signature = self._docs.pop(doc_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _sync(self):
+        """Loads signatures written since the last sync (by this or another process)."""
+        rows = self._connection().execute(
+            "SELECT rowid, doc_id, signature FROM signatures WHERE rowid > ? AND num_perm = ? "
+            "ORDER BY rowid DESC LIMIT ?",
+            (self._last_rowid, self.num_perm, self.max_docs)
+        ).fetchall()
+        for rowid, doc_id, blob in reversed(rows):
+            self._insert(doc_id, np.frombuffer(blob, dtype=np.uint32))
+            self._last_rowid = rowid
+
+    def find(self, doc_id, signature):
+        """Most similar indexed document other than doc_id itself.
+
+        Returns:
+            tuple[str, float] | None: (doc_id, similarity) at or above the threshold, or None
+        """
+        with self._lock:
+            self._sync()
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(doc_id)
+            return self.best_match(signature, [(candidate, self._docs[candidate]) for candidate in candidates])
+
+    def add(self, doc_id, signature):
+        with self._lock:
+            with self._connection() as conn:
+                cursor = conn.execute(
+                    "INSERT OR REPLACE INTO signatures (doc_id, num_perm, signature) VALUES (?, ?, ?)",
+                    (doc_id, self.num_perm, signature.tobytes())
+                )
+                # Keep the file bounded like the in-memory index
+                conn.execute(
+                    "DELETE FROM signatures WHERE rowid <= ?", (cursor.lastrowid - self.max_docs,)
+                )
+            self._insert(doc_id, signature)
+
+    def best_match(self, signature, candidates):
+        """Most similar of candidates, a list of (doc_id, signature), at or above the threshold, or None."""
+        best = None
+        for candidate, other in candidates:
+            score = self.similarity(signature, other)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+
+def split_near_duplicates(index, collection, items, id_key, texts, fields):
+    """Separates items that near-duplicate an already analysed document.
+
+    An item is only treated as a duplicate if its canonical document's
+    results can be reused: either it is stored in collection, or it is an
+    earlier item of this batch that is not a duplicate itself. Nothing is
+    added to the index here; callers add each analysed item with index.add()
+    once its result is stored, so the index never points at documents that
+    were dropped or failed.
+
+    Args:
+        index (NearDuplicateIndex): Index of recent documents
+        collection (Collection): MongoDB collection holding processed results
+        items (list[dict]): Items about to be analysed
+        id_key (str): Item field stored as post_id in the collection
+        texts (list[str]): Text to compare, one per item
+        fields (list[str]): Result fields to fetch from stored canonical documents
+
+    Returns:
+        tuple[list[int], dict, list]: Indices to analyse, {index: (canonical_id, stored doc or None)}
+            for the duplicates (None when the canonical is in this batch), and each item's signature
+    """
+    signatures = [index.signature(text) for text in texts]
+    canonical_ids = {}
+    batch = []  # (id, signature) of this batch's items that matched nothing so far
+    for i, (item, signature) in enumerate(zip(items, signatures)):
+        match = index.find(item[id_key], signature)
+        if match is None:
+            match = index.best_match(signature, [(doc_id, other) for doc_id, other in batch if doc_id != item[id_key]])
+        if match:
+            canonical_ids[i] = match[0]
+        else:
+            batch.append((item[id_key], signature))
+
+    stored = {}
+    if canonical_ids:
+        cursor = collection.find(
+            {"post_id": {"$in": list(set(canonical_ids.values()))}},
+            {field: 1 for field in ["post_id", *fields]}
+        )
+        stored = {doc["post_id"]: doc for doc in cursor}
+
+    in_batch = {doc_id for doc_id, _ in batch}
+    duplicates = {
+        i: (canonical_id, stored.get(canonical_id))
+        for i, canonical_id in canonical_ids.items()
+        if canonical_id in stored or canonical_id in in_batch
+    }
+    return [i for i in range(len(items)) if i not in duplicates], duplicates, signatures
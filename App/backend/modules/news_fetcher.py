@@ -1,24 +1,31 @@
 import os
 from finlight_client import FinlightApi
-from queue import Queue
 from datetime import datetime
 from dotenv import load_dotenv
+from modules.work_queue import open_queue
+from modules.lazy_resource import lazy_resource
 
 load_dotenv()
 
-# Temporary in-memory queue (replace with Redis or DB in production)
-processing_queue = Queue()
+# Durable work queue shared by the fetchers and the news worker(s); opened on first
+# use so importing this module does not create the SQLite file or reach MongoDB
+processing_queue = lazy_resource("news_queue", lambda: open_queue("news"))
 FINLIGHT_API_KEY = os.getenv("FINLIGHT_API_KEY")
 
 config = {
     "api_key": FINLIGHT_API_KEY,
+    # Per-attempt HTTP timeout in milliseconds and retries on 429/5xx; together they bound
+    # how long a lookup can hold one of the app's upstream threads
+    "timeout": int(float(os.getenv("FINLIGHT_TIMEOUT", 2.0)) * 1000),
+    "retry_count": int(os.getenv("FINLIGHT_RETRIES", 1)),
 }
 
-client = FinlightApi(config)
+# Built on first use so importing this module (e.g. from app.py) stays cheap
+finlight_client = lazy_resource("finlight_client", lambda: FinlightApi(config))
 
 def fetch_news_to_queue(query: str, page: int = 1, pageSize: int = 1, return_raw=False):
     print(f"Fetching news for query: {query}, page: {page}")
-    response = client.articles.get_extended_articles({
+    response = finlight_client.get().articles.get_extended_articles({
         "query": query,
         "pageSize": pageSize,
         "page": page,
@@ -30,6 +37,7 @@ def fetch_news_to_queue(query: str, page: int = 1, pageSize: int = 1, return_raw
         return [] if return_raw else None
 
     articles = []
+    queued = []
 
     for article in response["articles"]:
         item = {
@@ -45,7 +53,10 @@ def fetch_news_to_queue(query: str, page: int = 1, pageSize: int = 1, return_raw
         if return_raw:
             articles.append(item)
         else:
-            processing_queue.put(item)
+            queued.append(item)
             print(f"Queued: {item['title']}")
 
+    if queued:
+        processing_queue.get().put_many(queued)
+
     return articles if return_raw else None
\ No newline at end of file
@@ -1,21 +1,21 @@
 import os
-import re
-import html
-import contractions
 from gensim.models import Nmf, TfidfModel
 from gensim.corpora.dictionary import Dictionary
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords, wordnet
 from nltk.stem import WordNetLemmatizer
-from nltk import pos_tag
+from modules.text_normalizer import as_document
+from modules.result_cache import open_result_cache
+from modules.nmf_inference import build_tfidf_matrix, infer_topic_weights, top_k_topics
 
 class NewsTopicModeler:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, cache=None):
         """Initialize the topic modeling component.
         
         Args:
             model_path (str, optional): Path to the topic modeling model.
                                       If None, uses the default path in the backend directory.
+            cache (bool, optional): Reuse topics for already seen texts from the on-disk
+                                    result cache. Defaults to the RESULT_CACHE env var (on).
         """
         # if model_path is None:
         #     # Get the absolute path to the backend directory
@@ -72,6 +72,8 @@ class NewsTopicModeler:
         except Exception as e:
             print(f"Failed to load topic modeling components: {e}")
             raise
+
+        self.cache = open_result_cache("news_topics", base_path, cache=cache)
         
     def extract_topics(self, text):
         """Extract topics from the given text.
@@ -107,28 +109,56 @@ class NewsTopicModeler:
             print(f"Error during topic modeling: {str(e)}")
             raise 
 
-    def _preprocess_text(self, text):
-        us_placeholder = "__US_PLACEHOLDER__"
+    def extract_topics_batch(self, texts, top_k=3, batch_size=256):
+        """Extract topics for many texts with one matrix-based NMF solve.
 
-        text = re.sub(r'<.*?>', '', text)
-        text = html.unescape(html.unescape(text))
-        text = re.sub(r'http\S+|www\.\S+', '', text)
-        text = re.sub(r'U\.S\.', us_placeholder, text, flags=re.IGNORECASE)
-        text = re.sub(r'\bUS\b', us_placeholder, text)
+        Args:
+            texts (list[str]): The texts to analyze
+            top_k (int, optional): Number of topics to keep per text
+            batch_size (int, optional): Number of texts per NMF solve
 
+        Returns:
+            list[list]: Topic lists in the same order and format as extract_topics
+        """
         try:
-            text = contractions.fix(text)
-        except Exception:
-            pass
-
-        text = re.sub(r"\b(\w+)'s\b", r"\1", text)
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = text.replace(us_placeholder, "U.S.")
-
-        tokens = word_tokenize(text)
-        tagged = pos_tag(tokens)
+            if self.cache is None:
+                return self._extract_topics_uncached(texts, top_k, batch_size)
+            # Keyed by the cleaned text the model actually sees
+            return self.cache.cached_batch(
+                [f"{top_k}\0{as_document(text).get('news_topics')}" for text in texts], texts,
+                lambda missing: self._extract_topics_uncached(missing, top_k, batch_size)
+            )
+
+        except Exception as e:
+            print(f"Error during topic modeling: {str(e)}")
+            raise
+
+    def _extract_topics_uncached(self, texts, top_k, batch_size):
+        print(f"Preprocessing {len(texts)} news articles...")
+        bows = [self.dictionary.doc2bow(self._preprocess_text(text)) for text in texts]
+        print("Extracting topics...")
+        results = []
+        for start in range(0, len(bows), batch_size):
+            tfidf_matrix = build_tfidf_matrix(
+                bows[start:start + batch_size], self.tfidf_model, self.nmf_model.num_tokens
+            )
+            weights = infer_topic_weights(self.nmf_model, tfidf_matrix)
+            top_topics = top_k_topics(
+                weights, top_k, self.nmf_model.minimum_probability
+            )
+            for doc_topics in top_topics:
+                results.append([
+                    {
+                        "topic": self.topic_labels.get(idx + 1, f"Topic {idx + 1}"),
+                        "score": round(score, 4)
+                    }
+                    for idx, score in doc_topics
+                ])
+        return results
+
+    def _preprocess_text(self, text):
+        # Cleaned, tokenized and tagged at most once per document, shared with any other stage
+        tagged = as_document(text).pos_tags("news_topics")
 
         def get_wordnet_pos(tag):
             if tag.startswith('J'): return wordnet.ADJ
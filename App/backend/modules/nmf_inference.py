@@ -0,0 +1,117 @@
+import numpy as np
+from gensim import matutils
+
+
+def build_tfidf_matrix(bows, tfidf_model, num_terms):
+    """Stack the TF-IDF vectors of a batch of BOW documents into one sparse matrix.
+
+    Args:
+        bows (list): Documents in gensim BOW format
+        tfidf_model (TfidfModel): Trained gensim TF-IDF model
+        num_terms (int): Vocabulary size of the NMF model
+
+    Returns:
+        scipy.sparse.csc_matrix: Terms x documents TF-IDF matrix
+    """
+    return matutils.corpus2csc(
+        [tfidf_model[bow] for bow in bows],
+        num_terms=num_terms,
+        num_docs=len(bows),
+        dtype=np.float64
+    )
+
+
+def infer_topic_weights(nmf_model, tfidf_matrix):
+    """Solve the topic weights of every document in a batch at once.
+
+    Mirrors gensim's Nmf.get_document_topics (projected coordinate descent
+    against the trained topic-term matrix, then optional normalization),
+    but updates all documents of the batch with numpy row operations. Each
+    document stops iterating once its own violation has converged, exactly
+    like a single-document call would.
+
+    Args:
+        nmf_model (Nmf): Trained gensim NMF model
+        tfidf_matrix (scipy.sparse.csc_matrix): Terms x documents TF-IDF matrix
+
+    Returns:
+        np.ndarray: Documents x topics weight matrix
+    """
+    W = nmf_model._W
+    num_terms, num_topics = W.shape
+    num_docs = tfidf_matrix.shape[1]
+
+    h = np.zeros((num_topics, num_docs))
+    if num_docs == 0:
+        return h.T
+
+    WtW = W.T.dot(W)
+    Wtv = np.asarray(tfidf_matrix.T.dot(W)).T
+    hessian = np.diag(WtW)
+    kappa = nmf_model._kappa
+
+    active = np.arange(num_docs)
+    h_error = np.zeros(num_docs)
+
+    for iter_number in range(nmf_model._h_max_iter):
+        permutation = nmf_model.random_state.permutation(num_topics)
+        h_active = h[:, active]
+        Wtv_active = Wtv[:, active]
+        violation = np.zeros(len(active))
+
+        for topic_idx in permutation:
+            grad = (WtW[topic_idx].dot(h_active) - Wtv_active[topic_idx]) * kappa / hessian[topic_idx]
+            projected_grad = np.where(h_active[topic_idx] == 0, np.minimum(grad, 0), grad)
+            violation += projected_grad * projected_grad
+            h_active[topic_idx] = np.maximum(h_active[topic_idx] - grad, 0.)
+
+        h[:, active] = h_active
+        error_ = np.sqrt(violation) / num_terms
+
+        if iter_number > 0:
+            converged = (h_error[active] != 0) & (np.abs(h_error[active] - error_) < nmf_model._h_stop_condition)
+        else:
+            converged = np.zeros(len(active), dtype=bool)
+
+        h_error[active] = error_
+        active = active[~converged]
+        if len(active) == 0:
+            break
+
+    if nmf_model.normalize:
+        sums = h.sum(axis=0)
+        np.divide(h, sums, out=h, where=sums != 0)
+
+    return h.T
+
+
+def top_k_topics(weights, k, minimum_probability=1e-8, exclude=()):
+    """Pick the k strongest topics of each document with argpartition.
+
+    Args:
+        weights (np.ndarray): Documents x topics weight matrix
+        k (int): Number of topics to keep per document
+        minimum_probability (float, optional): Weights at or below this are dropped
+        exclude (iterable, optional): 0-based topic indices that are never returned
+
+    Returns:
+        list[list[tuple[int, float]]]: (topic_idx, weight) pairs per document, strongest first
+    """
+    masked = np.where(weights > max(minimum_probability, 1e-8), weights, -np.inf)
+    exclude = list(exclude)
+    if exclude:
+        masked[:, exclude] = -np.inf
+
+    num_topics = masked.shape[1]
+    k = min(k, num_topics)
+    if k == 0:
+        return [[] for _ in range(masked.shape[0])]
+
+    candidates = np.argpartition(-masked, k - 1, axis=1)[:, :k]
+
+    results = []
+    for row, indices in zip(masked, candidates):
+        indices = np.sort(indices)
+        ranked = indices[np.argsort(-row[indices], kind="stable")]
+        results.append([(int(idx), float(row[idx])) for idx in ranked if np.isfinite(row[idx])])
+    return results
@@ -1,6 +1,8 @@
 import praw
 import os
 from datetime import datetime, timezone
+from modules.work_queue import open_queue
+from modules.lazy_resource import lazy_resource
 
 AVAILABLE_SUBREDDITS = [
     'StockMarket', 'stocks', 'ValueInvesting', 'Options',
@@ -8,25 +10,32 @@ AVAILABLE_SUBREDDITS = [
 ]
 DEFAULT_SUBREDDIT = 'stocks'
 
+# Durable work queue shared by the fetchers and the Reddit worker(s), opened on first use
+reddit_processing_queue = lazy_resource("reddit_queue", lambda: open_queue("reddit"))
+
 # PRAW Setup using environment variables
-try:
+def create_reddit_client():
     reddit = praw.Reddit(
         client_id=os.getenv("REDDIT_CLIENT_ID"),
         client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
         user_agent=f'python:market-bites-app:v1.0 (by /u/{os.getenv("REDDIT_USERNAME")})',
         username=os.getenv("REDDIT_USERNAME"),
-        password=os.getenv("REDDIT_PASSWORD")
+        password=os.getenv("REDDIT_PASSWORD"),
+        timeout=int(os.getenv("REDDIT_TIMEOUT", 10)) # Seconds per Reddit HTTP request
     )
     # Test authentication (optional but good)
     print(f"PRAW instance created successfully. Authenticated as: {reddit.user.me()}")
-except Exception as e:
-    print(f"ERROR: Failed to create PRAW instance or authenticate: {e}")
-    reddit = None
+    return reddit
+
+# Logs in on first use rather than at import; a failed login is retried on the next call
+reddit_client = lazy_resource("reddit_client", create_reddit_client)
 
 def fetch_hot_posts_praw(subreddit=DEFAULT_SUBREDDIT, posts: int = 0):
     """Fetches hot posts from a given subreddit using PRAW."""
-    if reddit is None:
-        print("ERROR: PRAW instance not available.")
+    try:
+        reddit = reddit_client.get()
+    except Exception as e:
+        print(f"ERROR: PRAW instance not available: {e}")
         return []
 
     if subreddit not in AVAILABLE_SUBREDDITS:
@@ -66,3 +75,21 @@ def fetch_hot_posts_praw(subreddit=DEFAULT_SUBREDDIT, posts: int = 0):
     except Exception as e:
         print(f"ERROR fetching/processing Reddit posts via PRAW for r/{subreddit}: {e}")
         return [] # Return empty list on error
+
+def fetch_hot_posts(subreddit=DEFAULT_SUBREDDIT, posts: int = 10):
+    """Fetches hot posts from a subreddit and queues them for the Reddit worker."""
+    found_posts = fetch_hot_posts_praw(subreddit=subreddit, posts=posts)
+
+    # Field names expected by reddit_worker.process_posts
+    queued = [
+        {
+            **post,
+            "author": post["source"],
+            "redditUrl": post["link"],
+            "created_utc": post["publishDate"],
+        }
+        for post in found_posts
+    ]
+    if queued:
+        reddit_processing_queue.get().put_many(queued)
+        print(f"Queued {len(queued)} posts from r/{subreddit}")
@@ -1,16 +1,18 @@
 import os
 import re
-import html
-import contractions
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords, wordnet
 from nltk.stem import WordNetLemmatizer
-from nltk import pos_tag
 from gensim.corpora.dictionary import Dictionary
 from gensim.models import Nmf, TfidfModel
+from modules.text_normalizer import as_document
+from modules.result_cache import open_result_cache
+from modules.nmf_inference import build_tfidf_matrix, infer_topic_weights, top_k_topics
+
+NUMERIC_PATTERN = re.compile(r'^\s*[+-]?(\d{1,3}(?:[.,]\d{3})*|\d+)(?:[.,]\d+)?\s*$')
+WORD_CHAR_PATTERN = re.compile(r'\w')
 
 class RedditTopicModeler:
-    def __init__(self, model_dir=None):
+    def __init__(self, model_dir=None, cache=None):
         if model_dir is None:
             base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             model_dir = os.path.join(base_path, 'models', 'nmf_reddit')
@@ -46,6 +48,7 @@ class RedditTopicModeler:
         self.nmf_model = Nmf.load(os.path.join(model_dir, 'gensim_nmf_tfidf.model'))
         self.dictionary = Dictionary.load(os.path.join(model_dir, 'gensim_dictionary.dict'))
         self.tfidf_model = TfidfModel.load(os.path.join(model_dir, 'gensim_tfidf.model'))
+        self.cache = open_result_cache("reddit_topics", model_dir, cache=cache)
 
     def _get_custom_stopwords(self):
         default = set(stopwords.words('english'))
@@ -70,35 +73,8 @@ class RedditTopicModeler:
         return default
 
     def preprocess(self, text):
-        def remove_markdown(t):
-            t = re.sub(r'\*\*(.*?)\*\*', r'\1', t)
-            t = re.sub(r'__(.*?)__', r'\1', t)
-            t = re.sub(r'\*(.*?)\*', r'\1', t)
-            t = re.sub(r'_(.*?)_', r'\1', t)
-            t = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', t)
-            t = re.sub(r'`{1,3}(.*?)`{1,3}', r'\1', t)
-            return t
-
-        us_placeholder = "__US_PLACEHOLDER__"
-        text = re.sub(r'<.*?>', '', text)
-        text = html.unescape(text)
-        text = html.unescape(text)
-        text = re.sub(r'\b[/\\\\]?[ur]/\w+\b', '', text)
-        text = remove_markdown(text)
-        text = re.sub(r'http\S+|www\.\S+', '', text)
-        text = re.sub(r'U\\.S\\.', us_placeholder, text, flags=re.IGNORECASE)
-        text = re.sub(r'\bUS\b', us_placeholder, text)
-        try:
-            text = contractions.fix(text)
-        except Exception:
-            pass
-        text = re.sub(r'\\n+|\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = text.replace(us_placeholder, "U.S.")
-
-        # Tokenization & Lemmatization
-        tokens = word_tokenize(text)
-        tagged = pos_tag(tokens)
+        # Tokenization & Lemmatization (tags cached on the document)
+        tagged = as_document(text).pos_tags("reddit_topics")
 
         def get_wordnet_pos(treebank_tag):
             if treebank_tag.startswith('J'): return wordnet.ADJ
@@ -114,10 +90,9 @@ class RedditTopicModeler:
 
         lemmas = [self.lemmatizer.lemmatize(resolve_us_token(token, pos), get_wordnet_pos(pos)).lower() for token, pos in tagged]
 
-        numeric_pattern = re.compile(r'^\s*[+-]?(\d{1,3}(?:[.,]\d{3})*|\d+)(?:[.,]\d+)?\s*$')
         punctuation_artifacts = {"''", "'s", "``", "--", "-", "\\-", "...", "`", "p."}
 
-        cleaned_tokens = [t for t in lemmas if t not in self.stopwords and len(t) > 1 and re.search(r'\w', t) and not numeric_pattern.fullmatch(t) and t not in punctuation_artifacts]
+        cleaned_tokens = [t for t in lemmas if t not in self.stopwords and len(t) > 1 and WORD_CHAR_PATTERN.search(t) and not NUMERIC_PATTERN.fullmatch(t) and t not in punctuation_artifacts]
         return cleaned_tokens
 
     def extract_topics(self, text):
@@ -146,3 +121,50 @@ class RedditTopicModeler:
         except Exception as e:
             print(f"Error during Reddit topic modeling: {e}")
             return []
+
+    def extract_topics_batch(self, texts, top_k=2, batch_size=256):
+        """Extract coherent topics for many texts with one matrix-based NMF solve.
+
+        Args:
+            texts (list[str]): The texts to analyze
+            top_k (int, optional): Number of coherent topics to keep per text
+            batch_size (int, optional): Number of texts per NMF solve
+
+        Returns:
+            list[list]: Topic lists in the same order and format as extract_topics
+        """
+        try:
+            if self.cache is None:
+                return self._extract_topics_uncached(texts, top_k, batch_size)
+            # Keyed by the cleaned text the model actually sees
+            return self.cache.cached_batch(
+                [f"{top_k}\0{as_document(text).get('reddit_topics')}" for text in texts], texts,
+                lambda missing: self._extract_topics_uncached(missing, top_k, batch_size)
+            )
+
+        except Exception as e:
+            print(f"Error during Reddit topic modeling: {e}")
+            return [[] for _ in texts]
+
+    def _extract_topics_uncached(self, texts, top_k, batch_size):
+        print(f"Preprocessing {len(texts)} posts for topic modeling...")
+        bows = [self.dictionary.doc2bow(self.preprocess(text)) for text in texts]
+        print("Extracting topics...")
+        results = []
+        for start in range(0, len(bows), batch_size):
+            tfidf_matrix = build_tfidf_matrix(
+                bows[start:start + batch_size], self.tfidf_model, self.nmf_model.num_tokens
+            )
+            weights = infer_topic_weights(self.nmf_model, tfidf_matrix)
+            top_topics = top_k_topics(
+                weights, top_k, self.nmf_model.minimum_probability, exclude=self.incoherent_indices
+            )
+            for doc_topics in top_topics:
+                results.append([
+                    {
+                        "name": self.topic_labels.get(idx + 1, f"Unknown Topic {idx + 1}"),
+                        "score": round(score, 4)
+                    }
+                    for idx, score in doc_topics
+                ])
+        return results
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join(BACKEND_DIR, "data", "result_cache.db"))
+
+
+def model_fingerprint(*sources):
+    """Short hash identifying a model version.
+
+    Each source is a local model directory, hashed from its files' relative
+    paths, sizes and modification times (cheap, and any retrain or copy of a
+    new model changes it), or any other string, e.g. a hub model name or a
+    setting such as "int8".
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        source = str(source)
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for file_name in sorted(files):
+                    path = os.path.join(root, file_name)
+                    stat = os.stat(path)
+                    digest.update(f"{os.path.relpath(path, source)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        else:
+            digest.update(f"{source}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_enabled(cache=None):
+    """Explicit flag if given, otherwise RESULT_CACHE (on unless set to 0)."""
+    if cache is None:
+        return os.getenv("RESULT_CACHE", "1") == "1"
+    return bool(cache)
+
+
+class ResultCache:
+    """Content-addressed SQLite cache of one analyzer's outputs.
+
+    Keys hash the normalized model input together with the model fingerprint,
+    so a model upgrade simply stops matching the old entries (which then age
+    out). Every worker process on the box shares one file: reads are plain
+    SELECTs under WAL, and the recency updates for hits are batched into the
+    next write. Each namespace keeps at most max_entries rows, evicting the
+    least recently used.
+    """
+
+    def __init__(self, namespace, fingerprint, path=DEFAULT_CACHE_PATH, max_entries=None):
+        self.namespace = namespace
+        self.fingerprint = fingerprint
+        self.path = path
+        self.max_entries = max_entries or int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 50000))
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+        self._local = threading.local()
+        self._pending_touches = set()
+        self._touch_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_lru ON results (namespace, last_used)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, normalized_input):
+        payload = f"{self.namespace}\0{self.fingerprint}\0{normalized_input}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Returns {key: value} for the keys present in the cache."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        conn = self._connection()
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        with self._touch_lock:
+            self._pending_touches.update(found)
+        return found
+
+    def put_many(self, entries):
+        """Stores {key: value}, records recent hits and evicts beyond max_entries."""
+        now = time.time()
+        with self._touch_lock:
+            touches, self._pending_touches = self._pending_touches, set()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (key, namespace, value, last_used) VALUES (?, ?, ?, ?)",
+                [(key, self.namespace, json.dumps(value), now) for key, value in entries.items()]
+            )
+            conn.executemany("UPDATE results SET last_used = ? WHERE key = ?", [(now, key) for key in touches])
+
+            count = conn.execute("SELECT COUNT(*) FROM results WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+            if count > self.max_entries:
+                evicted = conn.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results WHERE namespace = ? "
+                    "ORDER BY last_used LIMIT ?)",
+                    (self.namespace, count - self.max_entries)
+                ).rowcount
+                self.stats["evicted"] += evicted
+
+    def cached_batch(self, normalized_inputs, items, compute):
+        """Runs compute only on the items whose normalized input is not cached yet.
+
+        Args:
+            normalized_inputs (list[str]): What the model actually sees, one per item (the cache key)
+            items (list): What compute takes, one per item
+            compute (callable): list of items -> list of JSON-serializable results
+
+        Returns:
+            list: Results in the same order as items
+        """
+        keys = [self.key(normalized) for normalized in normalized_inputs]
+        found = self.get_many(keys)
+
+        # Identical inputs within the batch are computed once
+        first_missing = {}
+        for i, key in enumerate(keys):
+            if key not in found and key not in first_missing:
+                first_missing[key] = i
+        self.stats["hits"] += len(keys) - len(first_missing)
+        self.stats["misses"] += len(first_missing)
+
+        if first_missing:
+            computed = compute([items[i] for i in first_missing.values()])
+            new_entries = dict(zip(first_missing, computed))
+            self.put_many(new_entries)
+            found.update(new_entries)
+        elif found:
+            self.put_many({})  # Still record the hits' recency
+        return [found[key] for key in keys]
+
+
+def open_result_cache(namespace, *fingerprint_sources, cache=None):
+    """ResultCache for an analyzer, or None when caching is disabled."""
+    if not cache_enabled(cache):
+        return None
+    return ResultCache(namespace, model_fingerprint(*fingerprint_sources))
@@ -0,0 +1,45 @@
+import os
+import json
+
+# Historical Reddit posts checked into the repo; a fixed corpus for evaluations and benchmarks
+SAMPLE_CORPUS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "Data", "Historical Reddit", "Filtered Posts"
+)
+
+
+def load_sample_posts(limit=None, corpus_dir=SAMPLE_CORPUS_DIR, min_chars=200):
+    """Loads the filtered historical posts in a deterministic order.
+
+    Posts without a usable body (shorter than min_chars, [deleted] or [removed])
+    are skipped so every model sees real text.
+
+    Returns:
+        list[dict]: {"post_id", "title", "selftext", "subreddit"} sorted by file name then post id
+    """
+    posts = []
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(corpus_dir, file_name), encoding="utf-8") as f:
+            records = json.load(f)
+        subreddit = file_name[len("filtered_r_"):-len(".json")] if file_name.startswith("filtered_r_") else file_name
+        for record in sorted(records, key=lambda r: str(r.get("id", ""))):
+            selftext = (record.get("selftext") or "").strip()
+            if len(selftext) < min_chars or selftext in ("[deleted]", "[removed]"):
+                continue
+            posts.append({
+                "post_id": record.get("id"),
+                "title": record.get("title", ""),
+                "selftext": selftext,
+                "subreddit": subreddit,
+            })
+    # Interleave subreddits so small limits still cover both
+    by_subreddit = {}
+    for post in posts:
+        by_subreddit.setdefault(post["subreddit"], []).append(post)
+    interleaved = []
+    groups = list(by_subreddit.values())
+    for i in range(max((len(g) for g in groups), default=0)):
+        interleaved.extend(group[i] for group in groups if i < len(group))
+    return interleaved[:limit] if limit else interleaved
@@ -0,0 +1,136 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class _Flight:
+    """One in-progress upstream load that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """In-process LRU cache with TTL, stale-while-revalidate and single-flight loads.
+
+    Entries younger than ttl are served as-is. Entries younger than
+    ttl + stale_ttl are served immediately while one background load
+    refreshes them, started through run when given; if run refuses the
+    load, the stale value keeps being served and the next stale hit retries. Older entries are reloaded inline. Concurrent misses for
+    the same key share a single loader call; loader errors are never cached.
+    Callers waiting on a load give up with TimeoutError after timeout
+    seconds; the load itself carries on and still fills the cache.
+    """
+
+    def __init__(self, maxsize=256, ttl=300, stale_ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._entries = OrderedDict()  # key -> (loaded_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0,
+                      "skipped_refreshes": 0, "errors": 0}
+
+    def get_or_load(self, key, loader, timeout=None, run=None):
+        """Cached value for key, loading it with loader() on a miss.
+
+        Args:
+            key: Cache key
+            loader (callable): Fetches the value; its errors propagate to every waiting caller
+            timeout (float): Seconds to wait for a load started by this or another caller
+            run (callable): Starts the load elsewhere, called as run(fn, *args) like an
+                executor's submit; by default the first caller loads on its own thread
+                and stale entries are refreshed on a new daemon thread
+        """
+        now = time.monotonic()
+        refresh = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        refresh = self._inflight[key] = _Flight()
+                        self.stats["refreshes"] += 1
+                else:
+                    del self._entries[key]
+                    entry = None
+
+            if entry is None:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight()
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+
+        if entry is not None:
+            if refresh is not None:
+                self._refresh(key, loader, refresh, run)
+            return entry[1]
+
+        if leader and run is None:
+            self._load(key, loader, flight)
+        elif leader:
+            try:
+                run(self._load, key, loader, flight)
+            except Exception as e:
+                # The load never started; release anyone who joined it meanwhile
+                flight.error = e
+                with self._lock:
+                    self._inflight.pop(key, None)
+                flight.done.set()
+                raise
+        if not flight.done.wait(timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for the in-flight load of {key!r}")
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _refresh(self, key, loader, flight, run):
+        """Reloads a stale entry in the background; when run refuses, the stale value stays."""
+        if run is None:
+            threading.Thread(target=self._load, args=(key, loader, flight), daemon=True).start()
+            return
+        try:
+            run(self._load, key, loader, flight)
+        except Exception as e:
+            # Anyone who joined this load after the entry expired gets the refusal
+            flight.error = e
+            with self._lock:
+                self.stats["refreshes"] -= 1
+                self.stats["skipped_refreshes"] += 1
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _load(self, key, loader, flight):
+        try:
+            flight.value = loader()
+            with self._lock:
+                self._entries[key] = (time.monotonic(), flight.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl}
@@ -1,54 +1,92 @@
 import os
-import re
-import html
-import contractions
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import numpy as np
+from transformers import AutoTokenizer
+from modules.text_normalizer import normalize
+from modules.result_cache import open_result_cache
+
+ONNX_MODEL_FILE = "model.onnx"
+
+
+def default_model_dir():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, 'models', 'finbert_sentiment')
+
+
+def create_onnx_session(onnx_path, intra_op_threads=0, inter_op_threads=0):
+    """ONNX Runtime CPU session with full graph optimizations. 0 threads means ORT's default."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ImportError("The onnx sentiment backend needs onnxruntime (pip install onnxruntime)")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    return ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
 
 class SentimentAnalyzer:
-    def __init__(self, model_path=None):
-        """Initialize the sentiment analyzer with FinBERT model and tokenizer."""
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        model_dir = model_path or os.path.join(base_dir, 'models', 'finbert_sentiment')
+    def __init__(self, model_path=None, quantize=None, backend=None, onnx_threads=None, cache=None):
+        """Initialize the sentiment analyzer with FinBERT model and tokenizer.
+
+        Args:
+            model_path (str, optional): Directory of the fine-tuned FinBERT model.
+            quantize (bool, optional): Use dynamic int8 Linear layers (torch backend, CPU only).
+                Defaults to the QUANTIZE_MODELS env var.
+            backend (str, optional): "torch" or "onnx" (needs tasks/export_sentiment_onnx.py
+                to have been run). Defaults to the SENTIMENT_BACKEND env var, then "torch".
+            onnx_threads (int, optional): ONNX Runtime intra-op threads. Defaults to
+                the ONNX_THREADS env var; 0 lets ONNX Runtime decide.
+            cache (bool, optional): Reuse results for already seen inputs from the
+                on-disk result cache. Defaults to the RESULT_CACHE env var (on).
+        """
+        model_dir = model_path or default_model_dir()
+        self.backend = (backend or os.getenv("SENTIMENT_BACKEND", "torch")).lower()
 
-        print(f"Loading FinBERT from: {model_dir}")
+        print(f"Loading FinBERT ({self.backend}) from: {model_dir}")
         self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.quantized = False
+
+        if self.backend == "onnx":
+            # No torch import on this path
+            threads = onnx_threads if onnx_threads is not None else int(os.getenv("ONNX_THREADS", 0))
+            self.session = create_onnx_session(os.path.join(model_dir, ONNX_MODEL_FILE), intra_op_threads=threads)
+            self.session_inputs = [node.name for node in self.session.get_inputs()]
+            self.cache = open_result_cache("sentiment", model_dir, self.backend, cache=cache)
+            return
+        if self.backend != "torch":
+            raise ValueError(f"Unknown sentiment backend: {self.backend}")
+
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        from modules.model_quantization import quantization_requested, quantize_linear_layers
+
         self.model = AutoModelForSequenceClassification.from_pretrained(model_dir)
 
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model.to(self.device)
         self.model.eval()
 
+        if quantization_requested(quantize):
+            if self.device.type == "cpu":
+                print("Quantizing FinBERT Linear layers to int8...")
+                self.model = quantize_linear_layers(self.model)
+                self.quantized = True
+            else:
+                print("⚠️ int8 dynamic quantization is CPU-only; keeping fp32 FinBERT on GPU.")
+
+        # int8 outputs drift slightly from fp32, so they are cached separately
+        self.cache = open_result_cache(
+            "sentiment", model_dir, self.backend, "int8" if self.quantized else "fp32", cache=cache
+        )
+
     def preprocess(self, text):
-        def remove_markdown(t):
-            t = re.sub(r'\*\*(.*?)\*\*', r'\1', t)
-            t = re.sub(r'__(.*?)__', r'\1', t)
-            t = re.sub(r'\*(.*?)\*', r'\1', t)
-            t = re.sub(r'_(.*?)_', r'\1', t)
-            t = re.sub(r'^\s*#+\s*(.*?)\s*#*\s*$', r'\1', t, flags=re.MULTILINE)
-            t = re.sub(r'^\s*>\s?(.*)', r'\1', t, flags=re.MULTILINE)
-            t = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', t)
-            t = re.sub(r'`{1,3}(.*?)`{1,3}', r'\1', t, flags=re.DOTALL)
-            t = re.sub(r'~~(.*?)~~', r'\1', t)
-            t = re.sub(r'^\s*[\*\-\+]\s+', '', t, flags=re.MULTILINE)
-            t = re.sub(r'^\s*\d+\.\s+', '', t, flags=re.MULTILINE)
-            t = re.sub(r'^\s*[-*_]{3,}\s*$', '', t, flags=re.MULTILINE)
-            return t
-
-        text = re.sub(r'<.*?>', '', text)
-        text = html.unescape(html.unescape(text))
-        text = re.sub(r'\b[/\\]?[ur]/\w+\b', '', text)
-        text = remove_markdown(text)
-        text = re.sub(r'^\s*[|: -]+\|?\s*$\n?', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^.*\|(?:.*\|)+.*$\n?', '', text, flags=re.MULTILINE)
-        text = re.sub(r'http\S+|www\.\S+', '', text)
-        try:
-            text = contractions.fix(text)
-        except:
-            pass
-        text = re.sub(r'\\n+|\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return normalize(text, "sentiment")
 
     def analyze(self, text):
         """Analyze the sentiment of the given text.
@@ -59,40 +97,95 @@ class SentimentAnalyzer:
         Returns:
             dict: Sentiment results.
         """
+        return self.analyze_batch([text], batch_size=1)[0]
+
+    def analyze_batch(self, texts, batch_size=16):
+        """Analyze the sentiment of many texts with batched forward passes.
+
+        Inputs are sorted by token length so that each batch is only padded
+        to its own longest member. Results come back in the original order.
+        Texts already seen by this model are served from the result cache.
+
+        Args:
+            texts (list[str]): The texts to analyze.
+            batch_size (int, optional): Number of texts per forward pass.
+
+        Returns:
+            list[dict]: Sentiment results, one per input text (same schema as analyze).
+        """
         try:
-            cleaned_text = self.preprocess(text)
-            inputs = self.tokenizer(
-                cleaned_text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=256
-            ).to(self.device)
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probs = torch.nn.functional.softmax(logits, dim=1)
-                predicted_class = torch.argmax(probs, dim=1).item()
-                confidence = probs[0, predicted_class].item()
-
-            sentiment_map = {
-                1: "Very negative",
-                2: "Negative",
-                3: "Neutral",
-                4: "Positive",
-                5: "Very positive"
-            }
-
-            score = predicted_class + 1
-
-            return {
-                "sentiment": sentiment_map.get(score, "Unknown"),
-                "score": score,
-                "confidence": round(confidence, 4),
-                "class_probabilities": probs[0].tolist()
-            }
+            if not texts:
+                return []
+
+            cleaned_texts = [self.preprocess(text) for text in texts]
+            if self.cache is None:
+                return self._analyze_cleaned(cleaned_texts, batch_size)
+            return self.cache.cached_batch(
+                cleaned_texts, cleaned_texts, lambda missing: self._analyze_cleaned(missing, batch_size)
+            )
 
         except Exception as e:
             print(f"Error during sentiment analysis: {str(e)}")
             raise
+
+    def _analyze_cleaned(self, cleaned_texts, batch_size):
+        """Model results for already preprocessed texts."""
+        encodings = self.tokenizer(
+            cleaned_texts,
+            truncation=True,
+            max_length=256
+        )
+        features = [
+            {key: values[i] for key, values in encodings.items()}
+            for i in range(len(cleaned_texts))
+        ]
+
+        # Length buckets: neighbouring batches hold similarly sized inputs
+        order = sorted(range(len(features)), key=lambda i: len(features[i]["input_ids"]))
+        results = [None] * len(features)
+
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            probs = self._predict([features[i] for i in batch_indices])
+
+            for row, i in enumerate(batch_indices):
+                results[i] = self._format_result(probs[row])
+
+        return results
+
+    def _predict(self, batch_features):
+        """Class probabilities (numpy, batch x classes) for one padded batch."""
+        if self.backend == "onnx":
+            inputs = self.tokenizer.pad(batch_features, padding=True, return_tensors="np")
+            feed = {name: inputs[name].astype(np.int64) for name in self.session_inputs}
+            logits = self.session.run(["logits"], feed)[0]
+            return softmax(logits.astype(np.float32))
+
+        import torch
+        inputs = self.tokenizer.pad(batch_features, padding=True, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            probs = torch.nn.functional.softmax(outputs.logits, dim=1)
+        return probs.cpu().numpy()
+
+    def _format_result(self, probs):
+        """Build the sentiment result dict from one row of class probabilities."""
+        predicted_class = int(np.argmax(probs))
+        confidence = float(probs[predicted_class])
+
+        sentiment_map = {
+            1: "Very negative",
+            2: "Negative",
+            3: "Neutral",
+            4: "Positive",
+            5: "Very positive"
+        }
+
+        score = predicted_class + 1
+
+        return {
+            "sentiment": sentiment_map.get(score, "Unknown"),
+            "score": score,
+            "confidence": round(confidence, 4),
+            "class_probabilities": probs.tolist()
+        }
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class StagePipeline:
+    """Runs named stages as a small DAG on a thread pool.
+
+    A stage starts as soon as every stage it depends on has finished, and
+    receives their results as positional arguments in depends_on order.
+    Independent stages run concurrently; model inference in torch and the
+    numpy/scipy parts of gensim release the GIL for most of their work.
+
+    Stages get no thread budget of their own: torch's intra-op pool is
+    process-wide, so concurrent torch stages share whatever size the
+    process set once.
+    """
+
+    def __init__(self, max_workers=3):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = {}
+
+    def add_stage(self, name, fn, depends_on=()):
+        self.stages[name] = (fn, tuple(depends_on))
+        return self
+
+    def run(self):
+        """Runs every stage and returns {stage_name: result}. Re-raises the first stage error."""
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+                for name in ready:
+                    fn, deps = pending.pop(name)
+                    future = pool.submit(self._timed, name, fn, *[results[dep] for dep in deps])
+                    running[future] = name
+
+                if not running:
+                    raise ValueError(f"Stages with unresolvable dependencies: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        print("Stage timings: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()))
+        return results
+
+    def _timed(self, name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[name] = time.perf_counter() - start
@@ -0,0 +1,287 @@
+"""
+Shared text normalization for every analyzer.
+
+Each model was trained on text cleaned by its own chain of regex passes, so
+the chains are kept as named profiles that reproduce those outputs exactly.
+All patterns are compiled once at import time, and the newline/whitespace
+passes are merged into a single scan.
+
+Use normalize(text, profile) for one-off cleaning, or wrap the raw text in a
+NormalizedText so several stages can share the steps their profiles have in
+common (e.g. tag stripping and HTML unescaping) instead of redoing them. The
+same object also caches sentence splits, tokens and POS tags per profile, so
+each is computed at most once per article however many stages ask for it.
+"""
+import re
+import html
+import contractions
+import emoji
+from nltk import pos_tag
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+US_PLACEHOLDER = "__US_PLACEHOLDER__"
+
+HTML_TAG_PATTERN = re.compile(r'<.*?>')
+REDDIT_REF_PATTERN = re.compile(r'\b[/\\]?[ur]/\w+\b')
+URL_PATTERN = re.compile(r'http\S+|www\.\S+')
+NEWLINE_PATTERN = re.compile(r'\\n+|\n+')
+# Literal '\n' strings, real newlines and any other whitespace collapse to one space
+WHITESPACE_PATTERN = re.compile(r'(?:\\n+|\s)+')
+TABLE_SEPARATOR_PATTERN = re.compile(r'^\s*[|: -]+\|?\s*$\n?', re.MULTILINE)
+TABLE_CONTENT_PATTERN = re.compile(r'^.*\|(?:.*\|)+.*$\n?', re.MULTILINE)
+
+BOLD_STAR_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+BOLD_UNDERSCORE_PATTERN = re.compile(r'__(.*?)__')
+ITALIC_STAR_PATTERN = re.compile(r'\*(.*?)\*')
+ITALIC_UNDERSCORE_PATTERN = re.compile(r'_(.*?)_')
+HEADER_PATTERN = re.compile(r'^\s*#+\s*(.*?)\s*#*\s*$', re.MULTILINE)
+BLOCKQUOTE_PATTERN = re.compile(r'^\s*>\s?(.*)', re.MULTILINE)
+LINK_PATTERN = re.compile(r'\[(.*?)\]\(.*?\)')
+CODE_BLOCK_PATTERN = re.compile(r'`{1,3}(.*?)`{1,3}', re.DOTALL)
+INLINE_CODE_PATTERN = re.compile(r'`{1,3}(.*?)`{1,3}')
+STRIKETHROUGH_PATTERN = re.compile(r'~~(.*?)~~')
+UNORDERED_LIST_PATTERN = re.compile(r'^\s*[\*\-\+]\s+', re.MULTILINE)
+ORDERED_LIST_PATTERN = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+HORIZONTAL_RULE_PATTERN = re.compile(r'^\s*[-*_]{3,}\s*$', re.MULTILINE)
+
+US_DOTTED_PATTERN = re.compile(r'U\.S\.', re.IGNORECASE)
+# The Reddit topic model was trained with this (over-escaped) pattern, so it is kept as is
+US_DOTTED_ESCAPED_PATTERN = re.compile(r'U\\.S\\.', re.IGNORECASE)
+US_WORD_PATTERN = re.compile(r'\bUS\b')
+POSSESSIVE_PATTERN = re.compile(r"\b(\w+)'s\b")
+NON_LETTER_PATTERN = re.compile(r'[^a-zA-Z\s]')
+
+# Markdown passes shared by every markdown-aware profile, in order
+MARKDOWN_LINE_PASSES = (
+    (BOLD_STAR_PATTERN, r'\1'),
+    (BOLD_UNDERSCORE_PATTERN, r'\1'),
+    (ITALIC_STAR_PATTERN, r'\1'),
+    (ITALIC_UNDERSCORE_PATTERN, r'\1'),
+    (HEADER_PATTERN, r'\1'),
+    (BLOCKQUOTE_PATTERN, r'\1'),
+    (LINK_PATTERN, r'\1'),
+    (CODE_BLOCK_PATTERN, r'\1'),
+    (STRIKETHROUGH_PATTERN, r'\1'),
+    (UNORDERED_LIST_PATTERN, ''),
+    (ORDERED_LIST_PATTERN, ''),
+    (HORIZONTAL_RULE_PATTERN, ''),
+)
+
+MARKDOWN_INLINE_PASSES = (
+    (BOLD_STAR_PATTERN, r'\1'),
+    (BOLD_UNDERSCORE_PATTERN, r'\1'),
+    (ITALIC_STAR_PATTERN, r'\1'),
+    (ITALIC_UNDERSCORE_PATTERN, r'\1'),
+    (LINK_PATTERN, r'\1'),
+    (INLINE_CODE_PATTERN, r'\1'),
+)
+
+
+def _apply_passes(text, passes):
+    for pattern, replacement in passes:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def remove_emojis(text):
+    return emoji.replace_emoji(text, replace='')
+
+
+def remove_html_tags(text):
+    return HTML_TAG_PATTERN.sub('', text)
+
+
+def unescape_html(text):
+    """Unescapes HTML entities twice to handle double-encoded text."""
+    return html.unescape(html.unescape(text))
+
+
+def remove_reddit_refs(text):
+    return REDDIT_REF_PATTERN.sub('', text)
+
+
+def remove_markdown(text):
+    """Removes common markdown formatting after flattening newlines."""
+    text = NEWLINE_PATTERN.sub(' ', text)
+    return _apply_passes(text, MARKDOWN_LINE_PASSES).strip()
+
+
+def remove_markdown_multiline(text):
+    """Removes common markdown formatting while line structure is still intact."""
+    return _apply_passes(text, MARKDOWN_LINE_PASSES)
+
+
+def remove_inline_markdown(text):
+    """Removes emphasis, links and inline code only."""
+    return _apply_passes(text, MARKDOWN_INLINE_PASSES)
+
+
+def remove_tables(text):
+    text = TABLE_SEPARATOR_PATTERN.sub('', text)
+    return TABLE_CONTENT_PATTERN.sub('', text)
+
+
+def remove_urls(text):
+    return URL_PATTERN.sub('', text)
+
+
+def safe_expand_contractions(text):
+    """Expands contractions word by word, protecting acronyms like US, UK, GDP."""
+    expanded_words = []
+    for word in text.split():
+        if word.isupper() and len(word) <= 4:
+            expanded_words.append(word)
+        else:
+            expanded_words.append(contractions.fix(word))
+    return ' '.join(expanded_words)
+
+
+def expand_contractions(text):
+    try:
+        return contractions.fix(text)
+    except Exception:
+        return text
+
+
+def normalize_whitespace(text):
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def protect_us(text):
+    text = US_DOTTED_PATTERN.sub(US_PLACEHOLDER, text)
+    return US_WORD_PATTERN.sub(US_PLACEHOLDER, text)
+
+
+def protect_us_escaped(text):
+    text = US_DOTTED_ESCAPED_PATTERN.sub(US_PLACEHOLDER, text)
+    return US_WORD_PATTERN.sub(US_PLACEHOLDER, text)
+
+
+def restore_us(text):
+    return text.replace(US_PLACEHOLDER, "U.S.")
+
+
+def strip_possessives(text):
+    return POSSESSIVE_PATTERN.sub(r'\1', text)
+
+
+def keep_letters(text):
+    return NON_LETTER_PATTERN.sub('', text)
+
+
+STEPS = {
+    "emojis": remove_emojis,
+    "html_tags": remove_html_tags,
+    "unescape": unescape_html,
+    "reddit_refs": remove_reddit_refs,
+    "markdown": remove_markdown,
+    "markdown_multiline": remove_markdown_multiline,
+    "markdown_inline": remove_inline_markdown,
+    "tables": remove_tables,
+    "urls": remove_urls,
+    "safe_contractions": safe_expand_contractions,
+    "contractions": expand_contractions,
+    "whitespace": normalize_whitespace,
+    "protect_us": protect_us,
+    "protect_us_escaped": protect_us_escaped,
+    "restore_us": restore_us,
+    "possessives": strip_possessives,
+    "letters_only": keep_letters,
+}
+
+# Step order per model; each reproduces the cleaning that model was built with
+PROFILES = {
+    "ner": (
+        "html_tags", "unescape", "reddit_refs", "markdown", "tables", "urls",
+        "safe_contractions", "whitespace",
+    ),
+    "summarizer": (
+        "emojis", "html_tags", "unescape", "reddit_refs", "markdown", "tables", "urls",
+        "whitespace", "safe_contractions",
+    ),
+    "sentiment": (
+        "html_tags", "unescape", "reddit_refs", "markdown_multiline", "tables", "urls",
+        "contractions", "whitespace",
+    ),
+    "news_topics": (
+        "html_tags", "unescape", "urls", "protect_us", "contractions", "possessives",
+        "letters_only", "whitespace", "restore_us",
+    ),
+    "reddit_topics": (
+        "html_tags", "unescape", "reddit_refs", "markdown_inline", "urls", "protect_us_escaped",
+        "contractions", "whitespace", "restore_us",
+    ),
+}
+
+
+class NormalizedText:
+    """Raw text plus every intermediate cleaning result computed for it so far.
+
+    Profiles that start with the same steps reuse each other's work, so a
+    worker can wrap an article once and hand it to every stage. Sentences,
+    tokens and POS tags are computed lazily and cached per profile
+    (profile None means the raw text).
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._results = {(): raw}
+        self._sentences = {}
+        self._tokens = {}
+        self._pos_tags = {}
+
+    def __str__(self):
+        return self.raw
+
+    def get(self, profile):
+        steps = PROFILES[profile]
+        done = len(steps)
+        while steps[:done] not in self._results:
+            done -= 1
+
+        text = self._results[steps[:done]]
+        for i in range(done, len(steps)):
+            text = STEPS[steps[i]](text)
+            self._results[steps[:i + 1]] = text
+        return text
+
+    def text(self, profile=None):
+        return self.raw if profile is None else self.get(profile)
+
+    def sentences(self, profile=None):
+        if profile not in self._sentences:
+            self._sentences[profile] = sent_tokenize(self.text(profile))
+        return self._sentences[profile]
+
+    def tokens(self, profile=None):
+        if profile not in self._tokens:
+            self._tokens[profile] = word_tokenize(self.text(profile))
+        return self._tokens[profile]
+
+    def pos_tags(self, profile=None):
+        if profile not in self._pos_tags:
+            self._pos_tags[profile] = pos_tag(self.tokens(profile))
+        return self._pos_tags[profile]
+
+
+def normalize(text, profile):
+    """Clean text with the named profile.
+
+    Args:
+        text (str | NormalizedText): The text to clean
+        profile (str): One of the keys of PROFILES
+
+    Returns:
+        str: The cleaned text
+    """
+    if isinstance(text, NormalizedText):
+        return text.get(profile)
+
+    for step in PROFILES[profile]:
+        text = STEPS[step](text)
+    return text
+
+
+def as_document(text):
+    """Wraps a plain string in a NormalizedText; NormalizedText instances pass through."""
+    return text if isinstance(text, NormalizedText) else NormalizedText(str(text))
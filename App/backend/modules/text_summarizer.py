@@ -1,119 +1,109 @@
-from transformers import BartTokenizer, BartForConditionalGeneration
+from transformers import BartTokenizerFast, BartForConditionalGeneration
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from nltk.tokenize import sent_tokenize
 import numpy as np
 import torch
+import os
 import re
+import json
+import threading
 import textstat
-import contractions
-import html 
-import emoji
-
-def remove_emojis(text):
-    return emoji.replace_emoji(text, replace='')
-
-
-# Might have python version error where some emojis aren't recognised, so use the above 
-# def remove_emojis(text):
-#     emoji_pattern = re.compile(
-#         "["
-#         u"\U0001F600-\U0001F64F"  # Emoticons
-#         u"\U0001F300-\U0001F5FF"  # Symbols & pictographs
-#         u"\U0001F680-\U0001F6FF"  # Transport & map symbols
-#         u"\U0001F1E0-\U0001F1FF"  # Flags
-#         u"\U00002700-\U000027BF"  # Dingbats
-#         u"\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-#         u"\U00002600-\U000026FF"  # Misc symbols
-#         u"\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-#         "]+",
-#         flags=re.UNICODE
-#     )
-#     return emoji_pattern.sub(r'', text)
+from modules.text_normalizer import normalize, as_document
+from modules.model_quantization import quantization_requested, quantize_linear_layers
+from modules.result_cache import open_result_cache
+
+BART_ARTIFACT_PATTERNS = [
+    re.compile(r"(?i)visit cnn\.com.*"),
+    re.compile(r"(?i)click here to.*"),
+    re.compile(r"(?i)iReporter.*Travel Snapshots.*"),
+    re.compile(r"(?i)cnn\.com will feature.*travel snapshots.*"),
+    re.compile(r"(?i)cnn\.com will feature.*"),
+    re.compile(r"(?i)for a new gallery.*"),
+]
 
 def remove_common_bart_artifacts(text):
-    patterns = [
-        r"(?i)visit cnn\.com.*", 
-        r"(?i)click here to.*", 
-        r"(?i)iReporter.*Travel Snapshots.*",
-        r"(?i)cnn\.com will feature.*travel snapshots.*",  
-        r"(?i)cnn\.com will feature.*",                    
-        r"(?i)for a new gallery.*",                       
-    ]
-    for pattern in patterns:
-        text = re.sub(pattern, '', text).strip()
+    for pattern in BART_ARTIFACT_PATTERNS:
+        text = pattern.sub('', text).strip()
     return text
 
-def remove_markdown(text):
-    """Removes common markdown formatting."""
-    # Replace literal '\n' strings and actual newlines with a space
-    text = re.sub(r'\\n+|\n+', ' ', text)
-    # Bold: **text** or __text__
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-    text = re.sub(r'__(.*?)__', r'\1', text)
-    # Italics: *text* or _text_
-    text = re.sub(r'\*(.*?)\*', r'\1', text)
-    text = re.sub(r'_(.*?)_', r'\1', text) # Note: This might conflict with underscores in words if not handled carefully later
-    # Headers: Remove leading # and trailing #
-    text = re.sub(r'^\s*#+\s*(.*?)\s*#*\s*$', r'\1', text, flags=re.MULTILINE)
-    # Blockquotes: Remove leading >
-    text = re.sub(r'^\s*>\s?(.*)', r'\1', text, flags=re.MULTILINE)
-    # Links: [text](url) -> text
-    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-    # Code blocks (inline and block) - remove backticks and fences
-    text = re.sub(r'`{1,3}(.*?)`{1,3}', r'\1', text, flags=re.DOTALL)
-    # Strikethrough: ~~text~~
-    text = re.sub(r'~~(.*?)~~', r'\1', text)
-    # List items (remove bullets/numbers at the start of lines)
-    text = re.sub(r'^\s*[\*\-\+]\s+', '', text, flags=re.MULTILINE) # Unordered list markers
-    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE) # Ordered list markers
-    # Horizontal rules
-    text = re.sub(r'^\s*[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
-
-    return text.strip() # Return stripped text to remove leading/trailing whitespace
-
-def safe_expand_contractions(text):
-    words = text.split()
-    expanded_words = []
-    for word in words:
-        if word.isupper() and len(word) <= 4:  # protect acronyms like US, UK, GDP
-            expanded_words.append(word)
-        else:
-            expanded_words.append(contractions.fix(word))
-    return ' '.join(expanded_words)
-
 
 def initial_clean(text):
     """Performs initial text cleaning common to most pipelines."""
-    # --- Original Cleaning Steps FIRST ---
-    text = remove_emojis(text)
-    text = re.sub(r'<.*?>', '', text)                       # Remove HTML tags
-    text = html.unescape(text)                              # Unescape HTML entities
-    text = html.unescape(text)
-    text = re.sub(r'\b[/\\]?[ur]/\w+\b', '', text)           # Remove r/u/ references
-    text = remove_markdown(text)                          # Apply general markdown formatting removal
-    text = re.sub(r'^\s*[|: -]+\|?\s*$\n?', '', text, flags=re.MULTILINE) # Table separators
-    text = re.sub(r'^.*\|(?:.*\|)+.*$\n?', '', text, flags=re.MULTILINE) # Table content
-    text = re.sub(r'http\S+|www\.\S+', '', text)             # Remove URLs
-    # --- Final Cleanup ---
-    text = re.sub(r'\\n+|\n+', ' ', text)                   # Replace newlines with space
-    text = re.sub(r'\s+', ' ', text).strip()           # Normalize whitespace
-    text = safe_expand_contractions(text)
-    return text
+    return normalize(text, "summarizer")
+
+
+# quality is the original setup; balanced and fast use the distilled model
+# (also the fallback for when the large model keeps crashing)
+SUMMARY_TIERS = {
+    "quality": {"model": "facebook/bart-large-cnn", "num_beams": 5},
+    "balanced": {"model": "sshleifer/distilbart-cnn-12-6", "num_beams": 2},
+    "fast": {"model": "sshleifer/distilbart-cnn-12-6", "num_beams": 1},
+}
+
+# Automatic tier policy: queue depth thresholds and the "already short" input size
+BACKLOG_BALANCED = int(os.getenv("SUMMARY_BACKLOG_BALANCED", 200))
+BACKLOG_FAST = int(os.getenv("SUMMARY_BACKLOG_FAST", 1000))
+SHORT_INPUT_WORDS = int(os.getenv("SUMMARY_SHORT_INPUT_WORDS", 60))
+
 
 class TextSummarizer:
-    def __init__(self):
-        """Initialize the text summarization component. """ 
-        self.tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn")
-        self.model =  BartForConditionalGeneration.from_pretrained("facebook/bart-large-cnn")
+    def __init__(self, quantize=None, tier=None, cache=None):
+        """Initialize the text summarization component.
 
-        # If model keeps crashing, use these
-        # self.tokenizer = BartTokenizer.from_pretrained("sshleifer/distilbart-cnn-12-6")
-        # self.model = BartForConditionalGeneration.from_pretrained("sshleifer/distilbart-cnn-12-6")
+        Args:
+            quantize (bool, optional): Use dynamic int8 Linear layers, roughly
+                quartering the Linear weights' memory. Defaults to the QUANTIZE_MODELS env var.
+            tier (str, optional): "quality", "balanced", "fast" or "auto" (picked per
+                text from its length and the queue backlog). Defaults to the
+                SUMMARY_TIER env var, then "quality".
+            cache (bool, optional): Reuse summaries for already seen inputs from the
+                on-disk result cache. Defaults to the RESULT_CACHE env var (on).
+        """
+        self.tier = (tier or os.getenv("SUMMARY_TIER", "quality")).lower()
+        if self.tier != "auto" and self.tier not in SUMMARY_TIERS:
+            raise ValueError(f"Unknown summary tier: {self.tier}")
+        self.quantized = quantization_requested(quantize)
+
+        self._models = {}  # model name -> (tokenizer, model), loaded when a tier first needs it
+        self._models_lock = threading.Lock()
+
+        # Load the default tier's model up front, as before
+        default_tier = "quality" if self.tier == "auto" else self.tier
+        self.tokenizer, self.model = self._get_model(SUMMARY_TIERS[default_tier]["model"])
+
+        # Hub models have no local directory; their names and decoding settings identify them
+        self.cache = open_result_cache(
+            "summary", json.dumps(SUMMARY_TIERS, sort_keys=True), "int8" if self.quantized else "fp32", cache=cache
+        )
+
+    def _get_model(self, model_name):
+        with self._models_lock:
+            if model_name not in self._models:
+                print(f"Loading summarization model {model_name}...")
+                tokenizer = BartTokenizerFast.from_pretrained(model_name)
+                model = BartForConditionalGeneration.from_pretrained(model_name)
+                model.eval()
+                if self.quantized:
+                    print("Quantizing BART Linear layers to int8...")
+                    model = quantize_linear_layers(model)
+                self._models[model_name] = (tokenizer, model)
+            return self._models[model_name]
+
+    def is_short(self, filtered_text):
+        return len(filtered_text.split()) <= SHORT_INPUT_WORDS
+
+    def choose_tier(self, filtered_text, backlog=0):
+        """Automatic policy: short inputs and large backlogs trade quality for speed."""
+        if backlog >= BACKLOG_FAST or self.is_short(filtered_text):
+            return "fast"
+        if backlog >= BACKLOG_BALANCED:
+            return "balanced"
+        return "quality"
 
     
-    def readability_adjusted_top_k(self, text, min_k=3, max_k=6):
-        sentences = sent_tokenize(text)
+    def readability_adjusted_top_k(self, text, min_k=3, max_k=6, sentences=None):
+        if sentences is None:
+            sentences = sent_tokenize(text)
         sentence_count = len(sentences)
         readability_score = textstat.flesch_reading_ease(text)
 
@@ -128,21 +118,23 @@ class TextSummarizer:
         top_k = int(sentence_count * ratio)
         return max(min_k, min(top_k, max_k, sentence_count))
 
-    def extract_top_sentences(self, text, top_k=4):
-        sentences = sent_tokenize(text)
+    def extract_top_sentences(self, text, top_k=4, sentences=None):
+        if sentences is None:
+            sentences = sent_tokenize(text)
         if len(sentences) <= top_k:
             return ' '.join(sentences)
         
-        vectorizer = TfidfVectorizer().fit_transform(sentences)
-        similarity_matrix = cosine_similarity(vectorizer)
+        # TF-IDF rows are L2-normalized, so row i of the cosine similarity matrix sums
+        # to tfidf[i] . (sum of all rows): a sparse mat-vec instead of a dense n x n matrix
+        tfidf = TfidfVectorizer().fit_transform(sentences)
 
         # Rank by sum of similarities (basic centrality)
-        scores = similarity_matrix.sum(axis=1)
+        scores = np.asarray(tfidf @ tfidf.sum(axis=0).T).ravel()
         ranked_indices = np.argsort(scores)[::-1]
         top_sentences = [sentences[i] for i in ranked_indices[:top_k]]
         return ' '.join(top_sentences)
         
-    def summarize(self, text, max_length=100):
+    def summarize(self, text, max_length=100, tier=None):
         """Generate a summary of the given text.
         
         Args:
@@ -153,50 +145,132 @@ class TextSummarizer:
             dict: Contains the generated summary and metadata
                   {"summary": "...", "confidence": 0.95}
         """
+        return self.summarize_batch([text], max_length=max_length, batch_size=1, tier=tier)[0]
+
+    def summarize_batch(self, texts, max_length=100, batch_size=8, tier=None, backlog=0):
+        """Generate summaries for many texts, one generate call per length group.
+
+        Every text goes through the same extractive pre-filter as summarize.
+        Texts are then grouped by tier; within a tier the filtered inputs are
+        sorted by token length and generated in groups of batch_size, so
+        padding stays small within each group. In the fast tier, inputs that
+        are already short skip generation and keep their extracted sentences.
+        Inputs already summarized with the same tier come from the result cache.
+
+        Args:
+            texts (list[str]): The texts to summarize
+            max_length (int, optional): Maximum length of each summary in words
+            batch_size (int, optional): Number of inputs per generate call
+            tier (str, optional): Overrides the summarizer's tier for this call
+            backlog (int, optional): Items waiting in the queue, used by the "auto" tier
+
+        Returns:
+            list[str]: Summaries in the same order as texts
+        """
         try:
+            if not texts:
+                return []
+
             # Extract top informative sentences first
-            print("Processing for summary...")
-            processed = initial_clean(text)
-
-            top_k = self.readability_adjusted_top_k(processed)
-
-            filtered = self.extract_top_sentences(processed, top_k=top_k)
-          
-            # Tokenize and generate summary
-            print("Generating summary...")
-            inputs = self.tokenizer(
-                filtered,
-                return_tensors="pt",
+            print(f"Processing {len(texts)} texts for summary...")
+            texts = [as_document(text) for text in texts]
+            filtered_texts = [self._extract_input(text) for text in texts]
+
+            requested_tier = (tier or self.tier).lower()
+            if requested_tier == "auto":
+                tiers = [self.choose_tier(filtered, backlog) for filtered in filtered_texts]
+            else:
+                tiers = [requested_tier] * len(texts)
+
+            if self.cache is None:
+                return self._summarize_indices(range(len(texts)), filtered_texts, texts, tiers, max_length, batch_size)
+            # Keyed by the tier actually used, so "auto" reuses summaries across backlog levels
+            return self.cache.cached_batch(
+                [f"{tiers[i]}\0{max_length}\0{initial_clean(text)}" for i, text in enumerate(texts)],
+                list(range(len(texts))),
+                lambda missing: self._summarize_indices(missing, filtered_texts, texts, tiers, max_length, batch_size)
+            )
+
+        except Exception as e:
+            print(f"Error during text summarization: {str(e)}")
+            raise
+
+    def _summarize_indices(self, indices, filtered_texts, texts, tiers, max_length, batch_size):
+        """Summaries for texts[indices], in that order, one tier at a time."""
+        summaries = {}
+        for tier_name in SUMMARY_TIERS:
+            tier_indices = [i for i in indices if tiers[i] == tier_name]
+            if tier_name == "fast":
+                extractive = {i for i in tier_indices if self.is_short(filtered_texts[i])}
+                for i in extractive:
+                    summaries[i] = self._postprocess_summary(filtered_texts[i], texts[i])
+                tier_indices = [i for i in tier_indices if i not in extractive]
+            if tier_indices:
+                print(f"Generating {len(tier_indices)} summaries ({tier_name} tier)...")
+                self._generate(tier_indices, filtered_texts, texts, SUMMARY_TIERS[tier_name],
+                               max_length, batch_size, summaries)
+        return [summaries[i] for i in indices]
+
+    def _generate(self, indices, filtered_texts, texts, tier_config, max_length, batch_size, summaries):
+        """Abstractive summaries for texts[indices] with one tier's model and decoding settings."""
+        tokenizer, model = self._get_model(tier_config["model"])
+        encodings = tokenizer(
+            [filtered_texts[i] for i in indices],
+            truncation=True,
+            max_length=512
+        )
+        features = {
+            i: {key: values[row] for key, values in encodings.items()}
+            for row, i in enumerate(indices)
+        }
+
+        decoding = {"num_beams": tier_config["num_beams"]}
+        if tier_config["num_beams"] > 1:
+            decoding.update(early_stopping=True, length_penalty=1.0)
+
+        # Group inputs of similar token length into the same generate call
+        order = sorted(indices, key=lambda i: len(features[i]["input_ids"]))
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            inputs = tokenizer.pad(
+                [features[i] for i in batch_indices],
                 padding=True,
-                truncation=True,
-                max_length=512
+                return_tensors="pt"
             )
 
             with torch.no_grad():
-                summary_ids = self.model.generate(
+                summary_ids = model.generate(
                     inputs.input_ids,
-                    num_beams=5,
+                    attention_mask=inputs.attention_mask,
                     max_length=max_length,
                     min_length=30,
-                    early_stopping=True,
-                    length_penalty=1.0,
-                    no_repeat_ngram_size=2
+                    no_repeat_ngram_size=2,
+                    **decoding
                 )
 
-            decoded = self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+            decoded_batch = tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+            for i, decoded in zip(batch_indices, decoded_batch):
+                summaries[i] = self._postprocess_summary(decoded, texts[i])
 
-            # to cut the summary off at the last complete sentence
-            clean_summary = decoded[:decoded.rfind('.') + 1] if '.' in decoded else decoded
-            cleaned_summary = remove_common_bart_artifacts(clean_summary)
+    def _extract_input(self, text):
+        """Clean the text and keep only its top informative sentences."""
+        document = as_document(text)
+        processed = initial_clean(document)
+        sentences = document.sentences("summarizer")
+        top_k = self.readability_adjusted_top_k(processed, sentences=sentences)
+        return self.extract_top_sentences(processed, top_k=top_k, sentences=sentences)
 
-            # Fallback: use first sentence of original input if summary is empty
-            if not cleaned_summary.strip():
-                print("Summary was empty after artifact removal. Falling back to first sentence.")
-                fallback_summary = sent_tokenize(text)[0] if sent_tokenize(text) else ''
-                return fallback_summary
+    def _postprocess_summary(self, decoded, text):
+        """Trim a decoded summary and fall back to the first cleaned sentence of text if empty."""
+        # to cut the summary off at the last complete sentence
+        clean_summary = decoded[:decoded.rfind('.') + 1] if '.' in decoded else decoded
+        cleaned_summary = remove_common_bart_artifacts(clean_summary)
 
-            return cleaned_summary
-            
-        except Exception as e:
-            print(f"Error during text summarization: {str(e)}")
-            raise 
\ No newline at end of file
+        # Fallback: first sentence of the cleaned input, the text the result cache is keyed on,
+        # so inputs that differ only in what cleaning removes never share a raw fallback
+        if not cleaned_summary.strip():
+            print("Summary was empty after artifact removal. Falling back to first sentence.")
+            sentences = as_document(text).sentences("summarizer")
+            return sentences[0] if sentences else ''
+
+        return cleaned_summary
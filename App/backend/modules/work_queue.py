@@ -0,0 +1,15 @@
+import os
+from modules.durable_queue import DurableQueue
+
+
+def open_queue(name):
+    """Opens the work queue selected by QUEUE_BACKEND.
+
+    "sqlite" (default) is a local durable queue for a single box; "mongo"
+    is the leased job queue in MongoDB for workers spread over several nodes.
+    """
+    backend = os.getenv("QUEUE_BACKEND", "sqlite").lower()
+    if backend == "mongo":
+        from modules.mongo_job_queue import MongoJobQueue
+        return MongoJobQueue(name)
+    return DurableQueue(name)
@@ -0,0 +1,426 @@
+# Micro-benchmarks for every analyzer and the text cleaners on the fixed local sample.
+#   python tasks/benchmark.py [--tiny] [--limit 200] [--heavy-limit 20] [--components sentiment.analyze ...]
+#                             [--warmup 3] [--repeats 5] [--output report.json]
+#                             [--save-baseline] [--fail-on-regression]
+# Each component runs in a fresh process, so peak RSS is its own. After --warmup untimed
+# calls, the sample is timed --repeats times; docs/sec and p50/p95 latency per document are
+# the medians over those passes. Reports them with peak RSS as JSON and compares them with
+# the stored baseline. --tiny swaps in small randomly initialized models built on the fly
+# from the sample (offline, CPU, seconds), so CI runs measure the code around the models.
+# Baselines are machine-specific and are not committed: record them on the CI runner,
+# with every component able to run there (NLTK data included, so the summarizer and topic
+# components do not error), using --save-baseline, and keep them in the CI cache. A
+# baseline taken with different --tiny/--limit/--heavy-limit is not compared. Without a
+# comparable baseline the run warns, and --fail-on-regression exits 1.
+# The result cache is disabled throughout: every call runs the model.
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import contextlib
+import multiprocessing
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ["RESULT_CACHE"] = "0"
+
+import numpy as np
+from modules.sample_corpus import load_sample_posts
+
+BASELINE_DIR = os.path.join(BACKEND_DIR, "tasks")
+
+
+def full_text(post):
+    return f"{post['title']} {post['selftext']}"
+
+
+# --- Tiny randomly initialized models, written to model_dir in the layout each analyzer loads ---
+
+def build_tiny_sentiment(model_dir, posts):
+    from tokenizers import BertWordPieceTokenizer
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    wordpiece = BertWordPieceTokenizer(lowercase=True)
+    wordpiece.train_from_iterator([full_text(post) for post in posts], vocab_size=2000)
+    os.makedirs(model_dir, exist_ok=True)
+    wordpiece.save_model(model_dir)
+    tokenizer = BertTokenizerFast(vocab_file=os.path.join(model_dir, "vocab.txt"))
+
+    config = BertConfig(
+        vocab_size=tokenizer.vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=512, num_labels=5
+    )
+    BertForSequenceClassification(config).save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    return model_dir
+
+
+def build_tiny_summarizer(model_dir, posts):
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast
+
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        [full_text(post) for post in posts], vocab_size=2000, special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+    )
+    os.makedirs(model_dir, exist_ok=True)
+    bpe.save_model(model_dir)
+    tokenizer = BartTokenizerFast(
+        vocab_file=os.path.join(model_dir, "vocab.json"), merges_file=os.path.join(model_dir, "merges.txt")
+    )
+
+    config = BartConfig(
+        vocab_size=len(tokenizer), d_model=32, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        max_position_embeddings=1024, pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+        forced_bos_token_id=tokenizer.bos_token_id
+    )
+    BartForConditionalGeneration(config).save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    return model_dir
+
+
+def build_tiny_topic_model(model_dir, posts, num_topics):
+    from gensim.corpora.dictionary import Dictionary
+    from gensim.models import Nmf, TfidfModel
+
+    documents = [text.lower().split() for text in [full_text(post) for post in posts]]
+    dictionary = Dictionary(documents)
+    bows = [dictionary.doc2bow(document) for document in documents]
+    tfidf = TfidfModel(bows)
+    nmf = Nmf(corpus=tfidf[bows], num_topics=num_topics, id2word=dictionary, passes=1, random_state=0)
+
+    os.makedirs(model_dir, exist_ok=True)
+    nmf.save(os.path.join(model_dir, "gensim_nmf_tfidf.model"))
+    dictionary.save(os.path.join(model_dir, "gensim_dictionary.dict"))
+    tfidf.save(os.path.join(model_dir, "gensim_tfidf.model"))
+    return model_dir
+
+
+def build_tiny_ner(model_dir, posts):
+    import spacy
+
+    nlp = spacy.blank("en")
+    ner = nlp.add_pipe("ner")
+    for label in ("ORG", "PERSON", "GPE", "MONEY"):
+        ner.add_label(label)
+    nlp.initialize()
+    nlp.to_disk(model_dir)
+    return model_dir
+
+
+# --- Components: setup(tiny_dir, posts) returns a function benchmarked once per post ---
+
+def setup_cleaner(profile, text_of):
+    def setup(tiny_dir, posts):
+        from modules.text_normalizer import normalize
+        return lambda post: normalize(text_of(post), profile)
+    return setup
+
+
+def load_sentiment(tiny_dir, posts):
+    from modules.sentiment_analyzer import SentimentAnalyzer
+    model_path = build_tiny_sentiment(os.path.join(tiny_dir, "sentiment"), posts) if tiny_dir else None
+    return SentimentAnalyzer(model_path=model_path, quantize=False, cache=False)
+
+
+def load_summarizer(tiny_dir, posts):
+    from modules import text_summarizer
+    if tiny_dir:
+        model_dir = build_tiny_summarizer(os.path.join(tiny_dir, "summarizer"), posts)
+        for tier_config in text_summarizer.SUMMARY_TIERS.values():
+            tier_config["model"] = model_dir
+    return text_summarizer.TextSummarizer(quantize=False, tier="quality", cache=False)
+
+
+def load_news_topics(tiny_dir, posts):
+    from modules.news_topic_modeler import NewsTopicModeler
+    model_path = build_tiny_topic_model(os.path.join(tiny_dir, "nmf_news"), posts, 25) if tiny_dir else None
+    return NewsTopicModeler(model_path=model_path, cache=False)
+
+
+def load_reddit_topics(tiny_dir, posts):
+    from modules.reddit_topic_modeler import RedditTopicModeler
+    model_dir = build_tiny_topic_model(os.path.join(tiny_dir, "nmf_reddit"), posts, 19) if tiny_dir else None
+    return RedditTopicModeler(model_dir=model_dir, cache=False)
+
+
+def load_news_ner(tiny_dir, posts):
+    from modules.ner_analyzer_news import NERNewsModel
+    if tiny_dir:
+        return NERNewsModel(model_name=build_tiny_ner(os.path.join(tiny_dir, "ner_news"), posts), cache=False)
+    return NERNewsModel(cache=False)
+
+
+def load_reddit_ner(tiny_dir, posts):
+    from modules.ner_analyzer_reddit import NERRedditModel
+    if tiny_dir:
+        return NERRedditModel(model_name=build_tiny_ner(os.path.join(tiny_dir, "ner_reddit"), posts), cache=False)
+    return NERRedditModel(cache=False)
+
+
+def first_sentences(post, chars=300):
+    """Stands in for a summary as the NER models' second input."""
+    return post["selftext"][:chars]
+
+
+def setup_sentiment(tiny_dir, posts):
+    analyzer = load_sentiment(tiny_dir, posts)
+    return lambda post: analyzer.analyze(full_text(post))
+
+
+def setup_summary_extraction(tiny_dir, posts):
+    summarizer = load_summarizer(tiny_dir, posts)
+    return lambda post: summarizer._extract_input(post["selftext"])
+
+
+def setup_summarize(tiny_dir, posts):
+    summarizer = load_summarizer(tiny_dir, posts)
+    return lambda post: summarizer.summarize(post["selftext"])
+
+
+def setup_news_topic_preprocess(tiny_dir, posts):
+    modeler = load_news_topics(tiny_dir, posts)
+    return lambda post: modeler._preprocess_text(full_text(post))
+
+
+def setup_news_topics(tiny_dir, posts):
+    modeler = load_news_topics(tiny_dir, posts)
+    return lambda post: modeler.extract_topics(full_text(post))
+
+
+def setup_reddit_topic_preprocess(tiny_dir, posts):
+    modeler = load_reddit_topics(tiny_dir, posts)
+    return lambda post: modeler.preprocess(full_text(post))
+
+
+def setup_reddit_topics(tiny_dir, posts):
+    modeler = load_reddit_topics(tiny_dir, posts)
+    return lambda post: modeler.extract_topics(full_text(post))
+
+
+def setup_news_ner(tiny_dir, posts):
+    model = load_news_ner(tiny_dir, posts)
+    return lambda post: model.extract_entities(post["title"], first_sentences(post))
+
+
+def setup_reddit_ner(tiny_dir, posts):
+    model = load_reddit_ner(tiny_dir, posts)
+    return lambda post: model.extract_entities(post["title"], first_sentences(post))
+
+
+# name -> (setup, heavy); heavy components only run on --heavy-limit posts
+COMPONENTS = {
+    "clean.summarizer": (setup_cleaner("summarizer", lambda post: post["selftext"]), False),
+    "clean.sentiment": (setup_cleaner("sentiment", full_text), False),
+    "clean.ner": (setup_cleaner("ner", lambda post: f"{post['title']}. {first_sentences(post)}"), False),
+    "clean.news_topics": (setup_cleaner("news_topics", full_text), False),
+    "clean.reddit_topics": (setup_cleaner("reddit_topics", full_text), False),
+    "sentiment.analyze": (setup_sentiment, False),
+    "summarizer.extract": (setup_summary_extraction, False),
+    "summarizer.summarize": (setup_summarize, True),
+    "news_topics.preprocess": (setup_news_topic_preprocess, False),
+    "news_topics.extract_topics": (setup_news_topics, False),
+    "reddit_topics.preprocess": (setup_reddit_topic_preprocess, False),
+    "reddit_topics.extract_topics": (setup_reddit_topics, False),
+    "news_ner.extract_entities": (setup_news_ner, False),
+    "reddit_ner.extract_entities": (setup_reddit_ner, False),
+}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_component(name, limit, tiny, threads, warmup, repeats):
+    """Runs one component in the current (fresh) process and returns its measurements."""
+    # Model and progress output goes to stderr; stdout carries only the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        return measure(name, limit, tiny, threads, warmup, repeats)
+
+
+def median(values):
+    return float(np.median(values))
+
+
+def measure(name, limit, tiny, threads, warmup=3, repeats=5):
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    posts = load_sample_posts(limit=limit)
+    setup, _ = COMPONENTS[name]
+    with tempfile.TemporaryDirectory() as tiny_dir:
+        fn = setup(tiny_dir if tiny else None, posts)
+        # Warm-up: lazy initialisation and first-call allocation are not part of the latency
+        for i in range(max(warmup, 1)):
+            fn(posts[i % len(posts)])
+
+        rates, p50s, p95s = [], [], []
+        for _ in range(max(repeats, 1)):
+            latencies = []
+            started = time.perf_counter()
+            for post in posts:
+                start = time.perf_counter()
+                fn(post)
+                latencies.append(time.perf_counter() - start)
+            rates.append(len(posts) / (time.perf_counter() - started))
+            p50s.append(np.percentile(latencies, 50))
+            p95s.append(np.percentile(latencies, 95))
+
+    return {
+        "docs": len(posts),
+        "repeats": len(rates),
+        "docs_per_sec": round(median(rates), 3),
+        "docs_per_sec_range": [round(min(rates), 3), round(max(rates), 3)],
+        "p50_ms": round(median(p50s) * 1000, 3),
+        "p95_ms": round(median(p95s) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_isolated(name, limit, tiny, threads, warmup, repeats):
+    """run_component in a spawned process; a component that cannot run reports its error."""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        try:
+            return pool.apply(run_component, (name, limit, tiny, threads, warmup, repeats))
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+
+# Run settings that change what is measured; baselines taken with other values are not compared
+COMPARABLE_SETTINGS = ("tiny", "limit", "heavy_limit")
+
+
+def settings_mismatch(report, baseline):
+    """{setting: (baseline value, current value)} for every setting that differs."""
+    return {
+        setting: (baseline.get(setting), report[setting])
+        for setting in COMPARABLE_SETTINGS
+        if baseline.get(setting) != report[setting]
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Relative change per metric against the baseline; flags changes for the worse beyond tolerance.
+
+    A component that ran in the baseline but fails now is a regression too.
+    Components the baseline does not cover are returned so the caller can
+    say they were not compared.
+    """
+    comparison, regressions, not_in_baseline = {}, [], []
+    for name, current in report["components"].items():
+        previous = baseline.get("components", {}).get(name)
+        if not previous:
+            not_in_baseline.append(name)
+            continue
+        if "error" in current and "error" not in previous:
+            regressions.append(f"{name}: now fails with {current['error'].splitlines()[0]}")
+            continue
+        if "error" in current or "error" in previous:
+            continue
+        changes = {}
+        for metric, higher_is_better in (("docs_per_sec", True), ("p95_ms", False), ("peak_rss_mb", False)):
+            if not previous[metric]:
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            changes[metric] = round(change, 4)
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name} {metric}: {previous[metric]} -> {current[metric]}")
+        comparison[name] = changes
+    return comparison, regressions, not_in_baseline
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiny", action="store_true", help="Use small randomly initialized models")
+    parser.add_argument("--limit", type=int, default=200, help="Posts per component")
+    parser.add_argument("--heavy-limit", type=int, default=20, help="Posts for the abstractive summarizer")
+    parser.add_argument("--components", nargs="+", choices=list(COMPONENTS), default=list(COMPONENTS))
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's)")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls before measuring")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes over the sample; medians are reported")
+    parser.add_argument("--baseline", help="Baseline JSON (default: tasks/benchmark_baseline[_tiny].json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative change for the worse")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit 1 if anything regressed or there is no baseline to compare with")
+    parser.add_argument("--output", help="Also write the JSON report to this path")
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(
+        BASELINE_DIR, "benchmark_baseline_tiny.json" if args.tiny else "benchmark_baseline.json"
+    )
+
+    report = {
+        "tiny": args.tiny, "limit": args.limit, "heavy_limit": args.heavy_limit,
+        "warmup": args.warmup, "repeats": args.repeats, "components": {}
+    }
+    for name in args.components:
+        limit = args.heavy_limit if COMPONENTS[name][1] else args.limit
+        print(f"⏱️ {name} ({limit} docs)...", file=sys.stderr)
+        report["components"][name] = run_isolated(name, limit, args.tiny, args.threads, args.warmup, args.repeats)
+
+    regressions, mismatch = [], {}
+    baseline_missing = not args.save_baseline and not os.path.exists(baseline_path)
+    if baseline_missing:
+        report["baseline"] = None
+    elif not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        report["baseline"] = baseline_path
+        mismatch = settings_mismatch(report, baseline)
+        if mismatch:
+            report["baseline_mismatch"] = {setting: list(values) for setting, values in mismatch.items()}
+        else:
+            report["comparison"], regressions, report["not_in_baseline"] = compare(report, baseline, args.tolerance)
+            report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            f.write(output)
+        print(f"✅ Saved baseline to {baseline_path}", file=sys.stderr)
+
+    if baseline_missing:
+        # Nothing was compared, so a regression gate must not pass silently
+        print(f"⚠️ No baseline at {baseline_path}; nothing was compared. "
+              f"Store one with --save-baseline.", file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+    if mismatch:
+        # Different sample sizes or models are not comparable, so nothing was compared
+        differences = ", ".join(f"{setting} {was} -> {now}" for setting, (was, now) in mismatch.items())
+        print(f"⚠️ Baseline {baseline_path} was taken with other settings ({differences}); "
+              f"nothing was compared.", file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+    if report.get("not_in_baseline"):
+        print(f"⚠️ Not in the baseline, so not compared: {', '.join(report['not_in_baseline'])}", file=sys.stderr)
+
+    if regressions:
+        print(f"⚠️ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
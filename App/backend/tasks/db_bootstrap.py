@@ -0,0 +1,28 @@
+# One-off maintenance: create indexes, backfill ner_keys on old documents,
+# and check that the search queries are served by those indexes.
+import os
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from modules.db_setup import ensure_indexes, backfill_ner_keys, explain_search_queries
+
+load_dotenv()
+
+client = MongoClient(os.getenv("MONGO_URI"))
+db = client["financial_data"]
+
+print("Ensuring indexes...")
+ensure_indexes(db)
+
+for collection_name in ["news_data", "reddit_data"]:
+    updated = backfill_ner_keys(db[collection_name])
+    print(f"Backfilled ner_keys on {updated} documents in {collection_name}.")
+
+print("Checking search query plans...")
+all_indexed = True
+for name, result in explain_search_queries(db).items():
+    status = "✅" if result["uses_index"] else "❌"
+    all_indexed = all_indexed and result["uses_index"]
+    print(f"{status} {name}: {' <- '.join(stage for stage in result['stages'] if stage)}")
+
+if not all_indexed:
+    exit(1)
@@ -0,0 +1,138 @@
+# Compares the int8 quantized FinBERT and BART against fp32 on the fixed local sample.
+#   python tasks/evaluate_quantization.py [--limit 100] [--summary-limit 20] [--output report.json]
+# Reports label agreement and confidence drift for sentiment, ROUGE of the int8
+# summaries against the fp32 ones, docs/sec for both, and model size savings.
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from modules.sentiment_analyzer import SentimentAnalyzer
+from modules.text_summarizer import TextSummarizer
+from modules.model_quantization import model_size_mb
+from modules.sample_corpus import load_sample_posts
+
+
+def ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for token in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if token == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge(candidate, reference):
+    """ROUGE-1/2/L F1 on lowercased whitespace tokens."""
+    cand, ref = candidate.lower().split(), reference.lower().split()
+    scores = {}
+    for n in (1, 2):
+        cand_ngrams, ref_ngrams = ngrams(cand, n), ngrams(ref, n)
+        overlap = sum((cand_ngrams & ref_ngrams).values())
+        scores[f"rouge{n}"] = f1(overlap, sum(cand_ngrams.values()), sum(ref_ngrams.values()))
+    scores["rougeL"] = f1(lcs_length(cand, ref), len(cand), len(ref))
+    return scores
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def compare_sentiment(texts, batch_size):
+    fp32 = SentimentAnalyzer(quantize=False, cache=False)
+    int8 = SentimentAnalyzer(quantize=True, cache=False)
+
+    fp32_results, fp32_seconds = timed(fp32.analyze_batch, texts, batch_size=batch_size)
+    int8_results, int8_seconds = timed(int8.analyze_batch, texts, batch_size=batch_size)
+
+    agreement = sum(a["score"] == b["score"] for a, b in zip(fp32_results, int8_results)) / len(texts)
+    confidence_diffs = [abs(a["confidence"] - b["confidence"]) for a, b in zip(fp32_results, int8_results)]
+    return {
+        "docs": len(texts),
+        "label_agreement": round(agreement, 4),
+        "confidence_abs_diff_mean": round(sum(confidence_diffs) / len(confidence_diffs), 4),
+        "confidence_abs_diff_max": round(max(confidence_diffs), 4),
+        "fp32_docs_per_sec": round(len(texts) / fp32_seconds, 2),
+        "int8_docs_per_sec": round(len(texts) / int8_seconds, 2),
+        "speedup": round(fp32_seconds / int8_seconds, 2),
+        "fp32_size_mb": round(model_size_mb(fp32.model), 1),
+        "int8_size_mb": round(model_size_mb(int8.model), 1),
+    }
+
+
+def compare_summaries(texts, batch_size):
+    fp32 = TextSummarizer(quantize=False, cache=False)
+    int8 = TextSummarizer(quantize=True, cache=False)
+
+    fp32_summaries, fp32_seconds = timed(fp32.summarize_batch, texts, batch_size=batch_size)
+    int8_summaries, int8_seconds = timed(int8.summarize_batch, texts, batch_size=batch_size)
+
+    per_doc = [rouge(candidate, reference) for candidate, reference in zip(int8_summaries, fp32_summaries)]
+    report = {
+        name: round(sum(scores[name] for scores in per_doc) / len(per_doc), 4)
+        for name in ("rouge1", "rouge2", "rougeL")
+    }
+    report.update({
+        "docs": len(texts),
+        "identical_summaries": sum(a == b for a, b in zip(fp32_summaries, int8_summaries)),
+        "fp32_docs_per_sec": round(len(texts) / fp32_seconds, 3),
+        "int8_docs_per_sec": round(len(texts) / int8_seconds, 3),
+        "speedup": round(fp32_seconds / int8_seconds, 2),
+        "fp32_size_mb": round(model_size_mb(fp32.model), 1),
+        "int8_size_mb": round(model_size_mb(int8.model), 1),
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=100, help="Posts for the sentiment comparison")
+    parser.add_argument("--summary-limit", type=int, default=20, help="Posts for the (slower) summary comparison")
+    parser.add_argument("--sentiment-batch-size", type=int, default=16)
+    parser.add_argument("--summary-batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's)")
+    parser.add_argument("--output", help="Also write the JSON report to this path")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    posts = load_sample_posts(limit=max(args.limit, args.summary_limit))
+    report = {
+        "torch_threads": torch.get_num_threads(),
+        "sentiment": compare_sentiment(
+            [f"{post['title']} {post['selftext']}" for post in posts[:args.limit]], args.sentiment_batch_size
+        ),
+        "summarizer": compare_summaries(
+            [post["selftext"] for post in posts[:args.summary_limit]], args.summary_batch_size
+        ),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Exports the FinBERT sentiment model to ONNX for SentimentAnalyzer(backend="onnx", cache=False).
+#   python tasks/export_sentiment_onnx.py [--model-dir models/finbert_sentiment] [--verify 64]
+# Writes model.onnx next to the torch weights, then checks that the ONNX Runtime
+# backend matches the torch backend on the fixed local sample.
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from modules.sentiment_analyzer import SentimentAnalyzer, ONNX_MODEL_FILE, default_model_dir
+from modules.sample_corpus import load_sample_posts
+
+
+def export(model_dir, opset=14):
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    model.config.return_dict = False  # Plain tuple outputs trace cleanly
+
+    sample = tokenizer(["Shares rallied after earnings.", "A second, longer example sentence."],
+                       padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    onnx_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            onnx_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    print(f"✅ Exported {onnx_path} ({os.path.getsize(onnx_path) / (1024 * 1024):.1f} MB)")
+    return onnx_path
+
+
+def verify(model_dir, limit, tolerance):
+    """Runs both backends on the sample and compares their class probabilities."""
+    texts = [f"{post['title']} {post['selftext']}" for post in load_sample_posts(limit=limit)]
+    torch_results = SentimentAnalyzer(model_path=model_dir, backend="torch", quantize=False, cache=False).analyze_batch(texts)
+    onnx_results = SentimentAnalyzer(model_path=model_dir, backend="onnx", cache=False).analyze_batch(texts)
+
+    max_diff = max(
+        float(np.max(np.abs(np.array(a["class_probabilities"]) - np.array(b["class_probabilities"]))))
+        for a, b in zip(torch_results, onnx_results)
+    )
+    label_mismatches = sum(a["score"] != b["score"] for a, b in zip(torch_results, onnx_results))
+    print(f"Compared {len(texts)} texts: max probability diff {max_diff:.2e}, label mismatches {label_mismatches}")
+    if max_diff > tolerance:
+        print(f"❌ ONNX output differs from torch by more than {tolerance}")
+        return False
+    print("✅ ONNX backend matches torch within tolerance")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", default=default_model_dir())
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--verify", type=int, default=64, help="Sample texts to compare (0 skips)")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    export(args.model_dir, opset=args.opset)
+    if args.verify and not verify(args.model_dir, args.verify, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
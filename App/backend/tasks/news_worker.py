@@ -1,9 +1,13 @@
 from datetime import datetime
 from pymongo import MongoClient
-from modules.sentiment_analyzer import SentimentAnalyzer
-from modules.text_summarizer import TextSummarizer
-from modules.news_topic_modeler import NewsTopicModeler
-from modules.ner_analyzer_news import NERNewsModel
+from modules.text_normalizer import NormalizedText
+from modules.dedup import filter_unprocessed, mark_empty_results
+from modules.bulk_writer import BulkUpserter
+from modules.stage_pipeline import StagePipeline
+from modules.db_setup import ensure_indexes, entity_keys
+from modules.lazy_resource import lazy_resource
+from modules.inference_gate import InferenceGate
+from modules.near_duplicates import NearDuplicateIndex, split_near_duplicates
 from modules.news_fetcher import processing_queue
 import os
 
@@ -12,27 +16,217 @@ MONGO_URI = os.getenv("MONGO_URI")
 client = MongoClient(MONGO_URI)
 db = client["financial_data"]
 news_collection = db["news_data"]
+ensure_indexes(db)
 
 
-# Instance of Models
-analyzer = SentimentAnalyzer() 
-topicModel = NewsTopicModeler()
-ner_model = NERNewsModel()
-summarizer = TextSummarizer()
+# Models load on first use (or up front via warm_up()); the library imports are
+# deferred too, so importing this module does not pay for models it never runs.
+# Names are shared with the other worker, so a process running both loads
+# FinBERT and BART once.
+def _set_torch_threads():
+    # torch has one intra-op pool per process, so it is sized once, before the first
+    # torch model loads, and every torch stage shares it. The summary stage runs on its
+    # own and gets every core; FinBERT later runs next to the topic and NER stages, so
+    # lower TORCH_THREADS to leave them room. The ONNX sentiment backend sizes its own
+    # session (ONNX_THREADS) instead.
+    import torch
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", os.cpu_count() or 2)))
+    return torch.get_num_threads()
 
+torch_threads = lazy_resource("torch_threads", _set_torch_threads)
 
-def process_news_queue():
-    while not processing_queue.empty():
-        article = processing_queue.get()
-        print(f"Processing: {article['title']}")
+def _load_sentiment():
+    if os.getenv("SENTIMENT_BACKEND", "torch").lower() == "torch":
+        torch_threads.get()
+    from modules.sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+def _load_summarizer():
+    torch_threads.get()
+    from modules.text_summarizer import TextSummarizer
+    return TextSummarizer()
+
+def _load_topic_model():
+    from modules.news_topic_modeler import NewsTopicModeler
+    return NewsTopicModeler()
+
+def _load_ner_model():
+    from modules.ner_analyzer_news import NERNewsModel
+    return NERNewsModel()
+
+analyzer = lazy_resource("sentiment_model", _load_sentiment)
+summarizer = lazy_resource("summarizer_model", _load_summarizer)
+topicModel = lazy_resource("news_topic_model", _load_topic_model)
+ner_model = lazy_resource("news_ner_model", _load_ner_model)
+
+# Skips items not worth running the models on; counts persist across batches
+gate = InferenceGate()
+
+# The same wire story under another link reuses the first copy's analysis
+near_duplicates = NearDuplicateIndex() if os.getenv("NEAR_DUPLICATES", "1") == "1" else None
+ANALYSIS_FIELDS = ["sentiment", "topics", "ner_results", "ner_keys", "summary"]
+
+
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 16))
+TOPIC_BATCH_SIZE = int(os.getenv("TOPIC_BATCH_SIZE", 256))
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 8))
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", 64))
+NER_PROCESSES = int(os.getenv("NER_PROCESSES", 1))
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", 100))
+WRITE_FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", 5.0))
+QUEUE_BATCH_SIZE = int(os.getenv("QUEUE_BATCH_SIZE", 32))
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 3))
+
+
+def process_news_queue(force=False):
+    """Drains the durable queue in batches, acking each item once its result is written."""
+    writer = BulkUpserter(news_collection, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL)
+    queue = processing_queue.get()
+
+    try:
+        while True:
+            claimed = queue.get_many(QUEUE_BATCH_SIZE)
+            if not claimed:
+                break
+            # Queue depth drives the summarizer's automatic tier (SUMMARY_TIER=auto)
+            backlog = queue.qsize()
+
+            try:
+                process_articles([article for _, article in claimed], writer, force=force, backlog=backlog)
+                writer.flush()
+                # Items whose result could not be stored go back on the queue
+                failed = {filter_doc["post_id"] for filter_doc in writer.pop_failed()}
+                queue.ack_many([item_id for item_id, article in claimed if article["link"] not in failed])
+                for item_id, article in claimed:
+                    if article["link"] in failed:
+                        queue.nack(item_id, "MongoDB write failed")
+            except Exception as e:
+                # Isolate the failing item(s) so the rest of the batch still gets through
+                print(f"❌ Batch of {len(claimed)} failed ({e}). Retrying articles one at a time...")
+                # Writes queued by the aborted batch would otherwise be blamed on the first retried item
+                writer.reset()
+                for item_id, article in claimed:
+                    try:
+                        process_articles([article], writer, force=force, backlog=backlog)
+                        writer.flush()
+                        if article["link"] in {filter_doc["post_id"] for filter_doc in writer.pop_failed()}:
+                            raise RuntimeError("MongoDB write failed")
+                        queue.ack(item_id)
+                    except Exception as item_error:
+                        print(f"❌ Failed to process {article['title']}: {item_error}")
+                        queue.nack(item_id, str(item_error))
+    finally:
+        # Hands back anything still claimed and stops the lease heartbeat
+        queue.close()
+
+    writer.report()
+    gate.report()
+    print("Queue processed and stored in MongoDB.")
+
+
+def process_articles(articles, writer, force=False, backlog=0):
+    # Only new or edited items go through the models unless reprocessing is forced
+    articles, content_hashes = filter_unprocessed(news_collection, articles, "link", "content", force=force)
+
+    if not articles:
+        return
+
+    # Near-duplicates are split off before the gate: syndicated copies usually share their
+    # title, and reusing the first copy's analysis beats dropping them as duplicate_title
+    duplicate_articles = []
+    signatures = [None] * len(articles)
+    if near_duplicates is not None:
+        fresh, duplicates, signatures = split_near_duplicates(
+            near_duplicates, news_collection, articles, "link",
+            [f"{article['title']} {article['content']}" for article in articles], ANALYSIS_FIELDS
+        )
+        duplicate_articles = [(articles[i], content_hashes[i], signatures[i], duplicates[i]) for i in duplicates]
+        articles = [articles[i] for i in fresh]
+        content_hashes = [content_hashes[i] for i in fresh]
+        signatures = [signatures[i] for i in fresh]
+
+    # The summarizer works on the body alone; its cleaned text and sentence split are cached on these
+    bodies = [NormalizedText(article['content']) for article in articles]
 
-        full_text = f"{article['title']} {article['content']}".strip()
+    # Cheap checks first: deleted, near-empty and duplicate-title items never reach a model
+    kept = gate.filter(articles, "link", "title", bodies)
+    articles = [articles[i] for i in kept]
+    content_hashes = [content_hashes[i] for i in kept]
+    bodies = [bodies[i] for i in kept]
+    signatures = [signatures[i] for i in kept]
 
-        # NLP processing
-        sentiment = analyzer.analyze(full_text)
-        topics = topicModel.extract_topics(full_text)
-        summary = summarizer.summarize(article['content'])
-        named_entities = ner_model.extract_entities(article["title"], summary)
+    analysed = analyse_articles(articles, content_hashes, bodies, signatures, writer, backlog)
+
+    if duplicate_articles:
+        store_near_duplicates(duplicate_articles, analysed, writer, backlog)
+
+
+def analyse_articles(articles, content_hashes, bodies, signatures, writer, backlog=0):
+    """Runs the models on articles and stores the results.
+
+    Returns:
+        dict: link -> stored result, for near-duplicates of these articles
+    """
+    if not articles:
+        return {}
+
+    # Every model runs batched across the claimed items
+    # Cleaned once per item; sentiment and topic profiles share their common steps
+    full_texts = [NormalizedText(f"{article['title']} {article['content']}".strip()) for article in articles]
+
+    # Summaries run first: items with an empty summary are never stored, so
+    # sentiment, topics and NER then run concurrently on the rest only
+    pipeline = StagePipeline(max_workers=PIPELINE_WORKERS)
+    pipeline.add_stage(
+        "summary",
+        lambda: summarizer.get().summarize_batch(
+            bodies, batch_size=SUMMARY_BATCH_SIZE, backlog=backlog
+        )
+    )
+    pipeline.add_stage(
+        "summarized",
+        lambda summaries: [i for i, summary in enumerate(summaries) if summary != ""],
+        depends_on=("summary",)
+    )
+    pipeline.add_stage(
+        "sentiment",
+        lambda summarized: analyzer.get().analyze_batch(
+            [full_texts[i] for i in summarized], batch_size=SENTIMENT_BATCH_SIZE
+        ),
+        depends_on=("summarized",)
+    )
+    pipeline.add_stage(
+        "topics",
+        lambda summarized: topicModel.get().extract_topics_batch(
+            [full_texts[i] for i in summarized], batch_size=TOPIC_BATCH_SIZE
+        ),
+        depends_on=("summarized",)
+    )
+    pipeline.add_stage(
+        "ner",
+        lambda summaries, summarized: ner_model.get().extract_entities_batch(
+            [(articles[i]["title"], summaries[i]) for i in summarized],
+            batch_size=NER_BATCH_SIZE,
+            n_process=NER_PROCESSES
+        ),
+        depends_on=("summary", "summarized")
+    )
+    results = pipeline.run()
+    summaries, summarized = results["summary"], results["summarized"]
+    gate.skip("empty_summary", len(articles) - len(summarized))
+
+    # Recorded so unchanged copies are not summarized again on the next fetch
+    empty = sorted(set(range(len(articles))) - set(summarized))
+    mark_empty_results(
+        news_collection, [articles[i]["link"] for i in empty], [content_hashes[i] for i in empty]
+    )
+
+    analysed = {}  # link -> stored result, for near-duplicates of articles in this batch
+    for i, sentiment, topics, named_entities in zip(
+        summarized, results["sentiment"], results["topics"], results["ner"]
+    ):
+        article, content_hash, summary = articles[i], content_hashes[i], summaries[i]
+        print(f"Processing: {article['title']}")
 
         # Save analysis result
         result_doc = {
@@ -46,17 +240,80 @@ def process_news_queue():
                           "confidence": sentiment["confidence"]},
             "topics": topics, # array e.g. [0: "topic", 1: "topic1"]
             "ner_results": named_entities,
+            "ner_keys": entity_keys(named_entities),
             "summary": summary,
+            "content_hash": content_hash,
+            "canonical_id": None,
             "publishDate": article["publishDate"],
             "processed_at": datetime.now()
         }
 
-        # Avoid duplicate results + don't add empty summaries
-        if result_doc["summary"] != "":
-            news_collection.update_one(
-                {"post_id": article["link"]},  # Match by post_id
-                {"$set": result_doc},          # Update with new content
-                upsert=True                    # Insert if not found
-            )
+        # Empty summaries were filtered out above
+        writer.upsert({"post_id": article["link"]}, result_doc)  # Match by post_id, insert if not found
+        analysed[article["link"]] = result_doc
 
-    print("Queue processed and stored in MongoDB.")
+        # Only stored articles become canonical for later copies
+        if near_duplicates is not None and signatures[i] is not None:
+            near_duplicates.add(article["link"], signatures[i])
+
+    return analysed
+
+
+def near_duplicate_doc(article, content_hash, canonical_id, canonical):
+    return {
+        "post_id": article["link"],
+        "title": article["title"],
+        "source": article["source"],
+        "content": article["content"],
+        "link": article["link"],
+        **{field: canonical.get(field) for field in ANALYSIS_FIELDS},
+        "content_hash": content_hash,
+        "canonical_id": canonical_id,
+        "publishDate": article["publishDate"],
+        "processed_at": datetime.now()
+    }
+
+
+def store_near_duplicates(duplicate_articles, analysed, writer, backlog=0):
+    """Stores near-duplicate articles with their canonical article's analysis.
+
+    When a canonical article from this batch was not stored (its summary came
+    out empty, or the gate skipped it), its first copy is analysed in its
+    place and becomes the canonical article for the other copies.
+    """
+    reused = 0
+    promoted = {}  # canonical_id that was not stored -> (article, content_hash, signature) analysed instead
+    waiting = []  # other copies of those canonicals
+    for article, content_hash, signature, (canonical_id, stored) in duplicate_articles:
+        # Canonicals from this batch are taken from its results (they may not be flushed yet)
+        canonical = analysed.get(canonical_id) or stored
+        if canonical is not None:
+            writer.upsert({"post_id": article["link"]}, near_duplicate_doc(article, content_hash, canonical_id, canonical))
+            reused += 1
+        elif canonical_id not in promoted:
+            promoted[canonical_id] = (article, content_hash, signature)
+        else:
+            waiting.append((article, content_hash, promoted[canonical_id][0]["link"]))
+
+    if promoted:
+        print(f"Analysing {len(promoted)} near-duplicate articles whose canonical article was not stored.")
+        articles, content_hashes, signatures = (list(column) for column in zip(*promoted.values()))
+        analysed = analyse_articles(
+            articles, content_hashes, [NormalizedText(article['content']) for article in articles],
+            signatures, writer, backlog
+        )
+
+        # A copy of a promoted article that came out empty would come out empty as well
+        empty = []
+        for article, content_hash, canonical_id in waiting:
+            canonical = analysed.get(canonical_id)
+            if canonical is None:
+                empty.append((article["link"], content_hash))
+                continue
+            writer.upsert({"post_id": article["link"]}, near_duplicate_doc(article, content_hash, canonical_id, canonical))
+            reused += 1
+        if empty:
+            gate.skip("empty_summary", len(empty))
+            mark_empty_results(news_collection, *(list(column) for column in zip(*empty)))
+
+    print(f"Reused analysis for {reused} near-duplicate articles.")
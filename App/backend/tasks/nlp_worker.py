@@ -0,0 +1,20 @@
+# Standalone NLP worker: run one per CPU node with QUEUE_BACKEND=mongo and
+# SCHEDULER_PROCESS=0 on the scheduler, so fetching and processing scale separately.
+import os
+import time
+from reddit_worker import process_reddit_queue
+from news_worker import process_news_queue
+from modules.lazy_resource import warm_up
+
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", 15))
+
+# Models otherwise load when the first batch needs them
+if os.getenv("WARM_UP", "0") == "1":
+    warm_up()
+
+print("NLP worker started. Waiting for queued items...\n")
+
+while True:
+    process_reddit_queue()
+    process_news_queue()
+    time.sleep(POLL_INTERVAL)
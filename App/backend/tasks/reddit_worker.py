@@ -1,10 +1,13 @@
 # reddit_worker.py
 from pymongo import MongoClient
 from datetime import datetime
-from modules.sentiment_analyzer import SentimentAnalyzer
-from modules.reddit_topic_modeler import RedditTopicModeler
-from modules.text_summarizer import TextSummarizer
-from modules.ner_analyzer_reddit import NERRedditModel
+from modules.text_normalizer import NormalizedText
+from modules.dedup import filter_unprocessed, mark_empty_results, refresh_unchanged
+from modules.bulk_writer import BulkUpserter
+from modules.stage_pipeline import StagePipeline
+from modules.db_setup import ensure_indexes, entity_keys
+from modules.lazy_resource import lazy_resource
+from modules.inference_gate import InferenceGate
 
 import os
 from dotenv import load_dotenv
@@ -17,24 +20,183 @@ MONGO_URI = os.getenv("MONGO_URI")
 client = MongoClient(MONGO_URI)
 db = client["financial_data"]
 reddit_collection = db["reddit_data"]
+ensure_indexes(db)
 
-analyzer = SentimentAnalyzer()
-summarizer = TextSummarizer()
-topicModel = RedditTopicModeler()
-ner_model = NERRedditModel()
+# Loaded on first use, as in news_worker.py; the shared sentiment/summarizer names
+# mean FinBERT and BART are only loaded once when both workers run in one process
+def _set_torch_threads():
+    # One process-wide pool, sized once as in news_worker.py
+    import torch
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", os.cpu_count() or 2)))
+    return torch.get_num_threads()
 
+torch_threads = lazy_resource("torch_threads", _set_torch_threads)
+
+def _load_sentiment():
+    if os.getenv("SENTIMENT_BACKEND", "torch").lower() == "torch":
+        torch_threads.get()
+    from modules.sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+def _load_summarizer():
+    torch_threads.get()
+    from modules.text_summarizer import TextSummarizer
+    return TextSummarizer()
+
+def _load_topic_model():
+    from modules.reddit_topic_modeler import RedditTopicModeler
+    return RedditTopicModeler()
+
+def _load_ner_model():
+    from modules.ner_analyzer_reddit import NERRedditModel
+    return NERRedditModel()
+
+analyzer = lazy_resource("sentiment_model", _load_sentiment)
+summarizer = lazy_resource("summarizer_model", _load_summarizer)
+topicModel = lazy_resource("reddit_topic_model", _load_topic_model)
+ner_model = lazy_resource("reddit_ner_model", _load_ner_model)
+
+# Skips items not worth running the models on; counts persist across batches.
+# Titles are not deduplicated: generic titles ("Daily Discussion Thread") repeat across
+# different posts, and cross-posts are separate results in each subreddit's search.
+gate = InferenceGate(dedupe_titles=False)
 
-def process_reddit_queue():
-    while not reddit_processing_queue.empty():
-        post = reddit_processing_queue.get()
-        print(f"Processing Reddit post: {post['title']}")
 
-        full_text = f"{post['title']} {post['selftext']}".strip()
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 16))
+TOPIC_BATCH_SIZE = int(os.getenv("TOPIC_BATCH_SIZE", 256))
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 8))
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", 64))
+NER_PROCESSES = int(os.getenv("NER_PROCESSES", 1))
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", 100))
+WRITE_FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", 5.0))
+QUEUE_BATCH_SIZE = int(os.getenv("QUEUE_BATCH_SIZE", 32))
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 3))
+
+
+def process_reddit_queue(force=False):
+    """Drains the durable queue in batches, acking each item once its result is written."""
+    writer = BulkUpserter(reddit_collection, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL)
+    queue = reddit_processing_queue.get()
+
+    try:
+        while True:
+            claimed = queue.get_many(QUEUE_BATCH_SIZE)
+            if not claimed:
+                break
+            # Queue depth drives the summarizer's automatic tier (SUMMARY_TIER=auto)
+            backlog = queue.qsize()
+
+            try:
+                process_posts([post for _, post in claimed], writer, force=force, backlog=backlog)
+                writer.flush()
+                # Items whose result could not be stored go back on the queue
+                failed = {filter_doc["post_id"] for filter_doc in writer.pop_failed()}
+                queue.ack_many([item_id for item_id, post in claimed if post["post_id"] not in failed])
+                for item_id, post in claimed:
+                    if post["post_id"] in failed:
+                        queue.nack(item_id, "MongoDB write failed")
+            except Exception as e:
+                # Isolate the failing item(s) so the rest of the batch still gets through
+                print(f"❌ Batch of {len(claimed)} failed ({e}). Retrying posts one at a time...")
+                # Writes queued by the aborted batch would otherwise be blamed on the first retried item
+                writer.reset()
+                for item_id, post in claimed:
+                    try:
+                        process_posts([post], writer, force=force, backlog=backlog)
+                        writer.flush()
+                        if post["post_id"] in {filter_doc["post_id"] for filter_doc in writer.pop_failed()}:
+                            raise RuntimeError("MongoDB write failed")
+                        queue.ack(item_id)
+                    except Exception as item_error:
+                        print(f"❌ Failed to process {post['title']}: {item_error}")
+                        queue.nack(item_id, str(item_error))
+    finally:
+        # Hands back anything still claimed and stops the lease heartbeat
+        queue.close()
+
+    writer.report()
+    gate.report()
+    print("Reddit queue processed and stored in MongoDB.")
 
-        sentiment = analyzer.analyze(full_text)
-        topics = topicModel.extract_topics(full_text)
-        summary = summarizer.summarize(post['selftext'])
-        named_entities = ner_model.extract_entities(post["title"], summary)
+
+def process_posts(posts, writer, force=False, backlog=0):
+    # Only new or edited items go through the models unless reprocessing is forced
+    fetched = posts
+    posts, content_hashes = filter_unprocessed(reddit_collection, posts, "post_id", "selftext", force=force)
+    # Unchanged posts skip the models, but their score and comment count are still refreshed
+    refresh_unchanged(writer, fetched, posts, "post_id", ("score", "num_comments"))
+
+    if not posts:
+        return
+
+    # The summarizer works on the body alone; its cleaned text and sentence split are cached on these
+    bodies = [NormalizedText(post['selftext']) for post in posts]
+
+    # Cheap checks first: deleted and near-empty items never reach a model
+    kept = gate.filter(posts, "post_id", "title", bodies)
+    posts = [posts[i] for i in kept]
+    content_hashes = [content_hashes[i] for i in kept]
+    bodies = [bodies[i] for i in kept]
+
+    if not posts:
+        return
+
+    # Every model runs batched across the claimed items
+    # Cleaned once per item; sentiment and topic profiles share their common steps
+    full_texts = [NormalizedText(f"{post['title']} {post['selftext']}".strip()) for post in posts]
+
+    # Summaries run first: items with an empty summary are never stored, so
+    # sentiment, topics and NER then run concurrently on the rest only
+    pipeline = StagePipeline(max_workers=PIPELINE_WORKERS)
+    pipeline.add_stage(
+        "summary",
+        lambda: summarizer.get().summarize_batch(
+            bodies, batch_size=SUMMARY_BATCH_SIZE, backlog=backlog
+        )
+    )
+    pipeline.add_stage(
+        "summarized",
+        lambda summaries: [i for i, summary in enumerate(summaries) if summary != ""],
+        depends_on=("summary",)
+    )
+    pipeline.add_stage(
+        "sentiment",
+        lambda summarized: analyzer.get().analyze_batch(
+            [full_texts[i] for i in summarized], batch_size=SENTIMENT_BATCH_SIZE
+        ),
+        depends_on=("summarized",)
+    )
+    pipeline.add_stage(
+        "topics",
+        lambda summarized: topicModel.get().extract_topics_batch(
+            [full_texts[i] for i in summarized], batch_size=TOPIC_BATCH_SIZE
+        ),
+        depends_on=("summarized",)
+    )
+    pipeline.add_stage(
+        "ner",
+        lambda summaries, summarized: ner_model.get().extract_entities_batch(
+            [(posts[i]["title"], summaries[i]) for i in summarized],
+            batch_size=NER_BATCH_SIZE,
+            n_process=NER_PROCESSES
+        ),
+        depends_on=("summary", "summarized")
+    )
+    results = pipeline.run()
+    summaries, summarized = results["summary"], results["summarized"]
+    gate.skip("empty_summary", len(posts) - len(summarized))
+
+    # Recorded so unchanged copies are not summarized again on the next fetch
+    empty = sorted(set(range(len(posts))) - set(summarized))
+    mark_empty_results(
+        reddit_collection, [posts[i]["post_id"] for i in empty], [content_hashes[i] for i in empty]
+    )
+
+    for i, sentiment, topics, named_entities in zip(
+        summarized, results["sentiment"], results["topics"], results["ner"]
+    ):
+        post, content_hash, summary = posts[i], content_hashes[i], summaries[i]
+        print(f"Processing Reddit post: {post['title']}")
 
         result_doc = {
             "post_id": post["post_id"],
@@ -45,7 +207,9 @@ def process_reddit_queue():
             "sentiment": {"score": sentiment["score"], "label": sentiment["sentiment"], "confidence": sentiment["confidence"]},
             "topics": topics,
             "ner_results": named_entities,
+            "ner_keys": entity_keys(named_entities),
             "summary": summary,
+            "content_hash": content_hash,
             "publishDate": post["created_utc"],
             "processed_at": datetime.now(),
             "subreddit": post["subreddit"],
@@ -53,12 +217,5 @@ def process_reddit_queue():
             "num_comments": post["num_comments"]
         }
 
-        # Avoid duplicate results + don't add empty summaries
-        if result_doc["summary"] != "":
-            reddit_collection.update_one(
-                {"post_id": post["post_id"]},  # Match by post_id
-                {"$set": result_doc},          # Update with new content
-                upsert=True                    # Insert if not found
-            )
-
-    print("Reddit queue processed and stored in MongoDB.")
+        # Empty summaries were filtered out above
+        writer.upsert({"post_id": post["post_id"]}, result_doc)  # Match by post_id, insert if not found
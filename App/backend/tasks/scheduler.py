@@ -1,21 +1,32 @@
+import os
 import schedule
 import time
 from modules.reddit_fetcher import fetch_hot_posts, AVAILABLE_SUBREDDITS
 from reddit_worker import process_reddit_queue
 from modules.news_fetcher import fetch_news_to_queue
 from news_worker import process_news_queue
+from modules.lazy_resource import warm_up
+
+# Set to 0 when separate nlp_worker processes consume the queues
+PROCESS_IN_SCHEDULER = os.getenv("SCHEDULER_PROCESS", "1") == "1"
+
+# With SCHEDULER_PROCESS=0 no models are ever loaded here
+if PROCESS_IN_SCHEDULER and os.getenv("WARM_UP", "0") == "1":
+    warm_up()
 
 def fetch_latest():
     print("Fetching and processing Reddit posts...")
     for sub in AVAILABLE_SUBREDDITS:
         print("Subreddit: ", sub)
         fetch_hot_posts(subreddit=sub, posts=5)
-    process_reddit_queue()
+    if PROCESS_IN_SCHEDULER:
+        process_reddit_queue()
     print("Fetched and processed Reddit posts.\n")
     print()
     print("Fetching and processing 20 news articles...")
     fetch_news_to_queue("", pageSize=75)
-    process_news_queue()
+    if PROCESS_IN_SCHEDULER:
+        process_news_queue()
     print("News done yay wait another hour")
 
 # Schedule the job every 30 minutes
@@ -0,0 +1,64 @@
+# Measures how long a cold import of the web app and each worker takes.
+# Each target is imported in a fresh interpreter, so nothing is cached between runs.
+#   python tasks/startup_timing.py [--runs 3] [--warm-up]
+# --warm-up also loads every lazy resource after the import, i.e. the cost of WARM_UP=1.
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TASKS_DIR = os.path.join(BACKEND_DIR, "tasks")
+TARGETS = ["app", "news_worker", "reddit_worker"]
+
+PROBE = """
+import sys, time, json
+sys.path[:0] = {paths!r}
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+warm = None
+if {warm_up}:
+    from modules.lazy_resource import warm_up
+    start = time.perf_counter()
+    warm_up()
+    warm = time.perf_counter() - start
+print("STARTUP_TIMING " + json.dumps({{"import_seconds": imported, "warm_up_seconds": warm}}))
+"""
+
+
+def time_import(module, warm_up=False):
+    code = PROBE.format(paths=[BACKEND_DIR, TASKS_DIR], module=module, warm_up=warm_up)
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_TIMING "):
+            return json.loads(line[len("STARTUP_TIMING "):])
+    raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warm-up", action="store_true")
+    parser.add_argument("--targets", nargs="+", default=TARGETS)
+    args = parser.parse_args()
+
+    report = {}
+    for module in args.targets:
+        runs = [time_import(module, args.warm_up) for _ in range(args.runs)]
+        imports = sorted(run["import_seconds"] for run in runs)
+        report[module] = {
+            "import_seconds_median": round(imports[len(imports) // 2], 3),
+            "import_seconds_min": round(imports[0], 3),
+        }
+        if args.warm_up:
+            warm = sorted(run["warm_up_seconds"] for run in runs)
+            report[module]["warm_up_seconds_median"] = round(warm[len(warm) // 2], 3)
+        print(f"{module}: {report[module]}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from unittest import mock
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from modules.bulk_writer import BulkUpserter
+
+
+class FakeCollection:
+    """Fails the listed post_ids with the given error codes, once or on every attempt."""
+
+    def __init__(self, failures=None, sticky=False, disconnects=0):
+        self.failures = dict(failures or {})
+        self.sticky = sticky
+        self.disconnects = disconnects
+        self.written = []
+        self.calls = 0
+
+    def bulk_write(self, ops, ordered=True):
+        self.calls += 1
+        if self.disconnects:
+            self.disconnects -= 1
+            raise AutoReconnect("connection reset")
+        errors = []
+        for i, op in enumerate(ops):
+            post_id = op._filter["post_id"]
+            if post_id in self.failures:
+                errors.append({"index": i, "code": self.failures[post_id]})
+                if not self.sticky:
+                    del self.failures[post_id]
+            else:
+                self.written.append(post_id)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+@pytest.fixture(autouse=True)
+def no_backoff():
+    with mock.patch("modules.bulk_writer.time.sleep"):
+        yield
+
+
+def make_writer(collection):
+    writer = BulkUpserter(collection, batch_size=100, flush_interval=3600)
+    for post_id in ["a", "b", "c"]:
+        writer.upsert({"post_id": post_id}, {"title": post_id})
+    return writer
+
+
+def test_transient_errors_are_retried():
+    collection = FakeCollection({"b": 112})
+    writer = make_writer(collection)
+
+    assert writer.flush() == []
+    assert sorted(collection.written) == ["a", "b", "c"]
+    assert collection.calls == 2
+    assert writer.stats["written"] == 3
+
+
+def test_permanent_errors_are_not_retried_and_returned():
+    collection = FakeCollection({"b": 11000})
+    writer = make_writer(collection)
+
+    assert writer.flush() == [{"post_id": "b"}]
+    assert collection.calls == 1
+    assert writer.stats["failed"] == 1
+    assert writer.pop_failed() == [{"post_id": "b"}]
+    assert writer.pop_failed() == []
+
+
+def test_transient_errors_give_up_after_max_retries():
+    collection = FakeCollection({"c": 189}, sticky=True)
+    writer = make_writer(collection)
+
+    assert writer.flush() == [{"post_id": "c"}]
+    assert collection.calls == writer.max_retries + 1
+    assert sorted(collection.written) == ["a", "b"]
+
+
+def test_lost_connection_resends_everything():
+    collection = FakeCollection(disconnects=1)
+    writer = make_writer(collection)
+
+    assert writer.flush() == []
+    assert sorted(collection.written) == ["a", "b", "c"]
+
+
+def test_failures_from_automatic_flushes_are_kept():
+    collection = FakeCollection({"a": 121})
+    writer = BulkUpserter(collection, batch_size=2, flush_interval=3600)
+    for post_id in ["a", "b", "c"]:
+        writer.upsert({"post_id": post_id}, {"title": post_id})
+    writer.flush()
+
+    assert writer.pop_failed() == [{"post_id": "a"}]
+
+
+def test_reset_discards_an_aborted_batch():
+    collection = FakeCollection({"a": 121})
+    writer = BulkUpserter(collection, batch_size=2, flush_interval=3600)
+    # The aborted batch flushed "a" (failed) and "b" automatically, then queued "c"
+    for post_id in ["a", "b", "c"]:
+        writer.upsert({"post_id": post_id}, {"title": post_id})
+
+    assert writer.reset() == 1
+    writer.upsert({"post_id": "b"}, {"title": "b"})
+    writer.flush()
+
+    assert writer.pop_failed() == []
+    assert collection.written == ["b", "b"]
@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+from modules.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, cooldown=60)
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+    assert breaker.state == "open"
+
+
+def test_overrunning_call_counts_as_failure_before_it_returns():
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=60, slow_call_seconds=0.05)
+    release = threading.Event()
+    worker = threading.Thread(target=breaker.call, args=(release.wait, 5))
+    worker.start()
+
+    time.sleep(0.2)
+    assert breaker.state == "open"
+
+    release.set()
+    worker.join()
+    # Returning late does not record the call a second time
+    assert breaker.snapshot()["failures"] == 1
+    assert breaker.state == "open"
+
+
+def test_fast_call_closes_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=3, cooldown=60, slow_call_seconds=1)
+
+    assert breaker.call(lambda: 42) == 42
+    assert breaker.snapshot()["failures"] == 0
+    assert breaker.state == "closed"
@@ -0,0 +1,81 @@
+from modules.bulk_writer import BulkUpserter
+from modules.dedup import content_hash, filter_unprocessed, refresh_unchanged
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection(self, name))
+
+
+class FakeCollection:
+    """Applies $set updates to documents keyed by post_id."""
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.docs = {}
+
+    def find(self, query, projection=None):
+        return [dict(self.docs[post_id]) for post_id in query["post_id"]["$in"] if post_id in self.docs]
+
+    def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            post_id = op._filter["post_id"]
+            if post_id in self.docs:
+                self.docs[post_id].update(op._doc["$set"])
+            elif op._upsert:
+                self.docs[post_id] = {**op._filter, **op._doc["$set"]}
+
+
+def make_post(post_id, body, score):
+    return {"post_id": post_id, "title": "Earnings beat", "selftext": body, "score": score, "num_comments": score // 2}
+
+
+def test_unchanged_post_refreshes_its_score():
+    collection = FakeDatabase()["reddit_data"]
+    collection.docs["p1"] = {
+        "post_id": "p1", "content_hash": content_hash("Earnings beat", "same body"),
+        "summary": "kept", "score": 5, "num_comments": 1,
+    }
+    writer = BulkUpserter(collection)
+
+    posts = [make_post("p1", "same body", 40)]
+    kept, _ = filter_unprocessed(collection, posts, "post_id", "selftext")
+    refresh_unchanged(writer, posts, kept, "post_id", ("score", "num_comments"))
+    writer.flush()
+
+    assert kept == []
+    stored = collection.docs["p1"]
+    assert (stored["score"], stored["num_comments"], stored["summary"]) == (40, 20, "kept")
+    assert "processed_at" in stored
+
+
+def test_refresh_skips_processed_and_unstored_posts():
+    collection = FakeDatabase()["reddit_data"]
+    collection.docs["p1"] = {"post_id": "p1", "content_hash": "old", "score": 5}
+    writer = BulkUpserter(collection)
+
+    posts = [make_post("p1", "edited body", 40), make_post("p2", "new body", 7)]
+    kept, _ = filter_unprocessed(collection, posts, "post_id", "selftext")
+    refresh_unchanged(writer, posts, kept, "post_id", ("score", "num_comments"))
+
+    assert [post["post_id"] for post in kept] == ["p1", "p2"]
+    assert writer.pending == []
+
+
+def test_refresh_never_creates_documents():
+    collection = FakeDatabase()["reddit_data"]
+    skipped = collection.database["reddit_data_skipped"]
+    skipped.docs["p3"] = {"post_id": "p3", "content_hash": content_hash("Earnings beat", "")}
+    writer = BulkUpserter(collection)
+
+    posts = [make_post("p3", "", 9)]
+    kept, _ = filter_unprocessed(collection, posts, "post_id", "selftext")
+    refresh_unchanged(writer, posts, kept, "post_id", ("score", "num_comments"))
+    writer.flush()
+
+    assert kept == []
+    assert collection.docs == {}
@@ -0,0 +1,151 @@
+import os
+import time
+import uuid
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from modules.mongo_job_queue import MongoJobQueue
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI", "mongodb://localhost:27017")
+
+
+def _mongod_reachable():
+    try:
+        MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _mongod_reachable(), reason=f"no mongod reachable at {MONGO_TEST_URI}")
+
+
+@pytest.fixture
+def make_queue():
+    """Queues on a throwaway name, removed from the jobs and worker_stats collections afterwards."""
+    name = f"test-{uuid.uuid4().hex}"
+    queues = []
+
+    def make(worker_id, **options):
+        queue = MongoJobQueue(name, mongo_uri=MONGO_TEST_URI, worker_id=worker_id, **options)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+    if queues:
+        queues[0].jobs.delete_many({"queue": name})
+        queues[0].worker_stats.delete_many({"queue": name})
+
+
+def test_claimed_jobs_are_leased_to_one_worker(make_queue):
+    first, second = make_queue("first"), make_queue("second")
+    first.put_many([{"n": 1}, {"n": 2}])
+
+    claimed = first.get_many(5)
+
+    assert [item for _, item in claimed] == [{"n": 1}, {"n": 2}]
+    assert second.get_many(5) == []
+    job = first.jobs.find_one({"_id": claimed[0][0]})
+    assert job["status"] == "leased" and job["lease_owner"] == "first"
+
+
+def test_expired_lease_is_reclaimed(make_queue):
+    crashed, survivor = make_queue("crashed", lease_seconds=1), make_queue("survivor")
+    crashed.put({"n": 1})
+    job_id, _ = crashed.get_many(1)[0]
+    crashed._stop.set()  # no heartbeat: the worker died
+
+    time.sleep(1.2)
+    reclaimed = survivor.get_many(1)
+
+    assert reclaimed == [(job_id, {"n": 1})]
+    assert survivor.jobs.find_one({"_id": job_id})["attempts"] == 2
+    # The old owner can no longer ack a job it lost
+    crashed.ack(job_id)
+    assert survivor.jobs.find_one({"_id": job_id}) is not None
+
+
+def test_renew_extends_the_lease(make_queue):
+    queue = make_queue("worker", lease_seconds=1)
+    queue.put({"n": 1})
+    job_id, _ = queue.get_many(1)[0]
+    before = queue.jobs.find_one({"_id": job_id})["lease_expires"]
+
+    time.sleep(0.1)
+    queue.renew()
+
+    assert queue.jobs.find_one({"_id": job_id})["lease_expires"] > before
+
+
+def test_ack_removes_jobs(make_queue):
+    queue = make_queue("worker")
+    queue.put_many([{"n": 1}, {"n": 2}])
+    claimed = queue.get_many(2)
+
+    queue.ack_many([job_id for job_id, _ in claimed])
+
+    assert queue.qsize() == 0
+    assert queue.throughput()[0]["processed"] == 2
+
+
+def test_nack_retries_then_dead_letters(make_queue):
+    queue = make_queue("worker", max_attempts=2, retry_delay=0)
+    queue.put({"n": 1})
+
+    job_id, _ = queue.get_many(1)[0]
+    queue.nack(job_id, "boom")
+    job_id, _ = queue.get_many(1)[0]
+    queue.nack(job_id, "boom again")
+
+    assert queue.get_many(1) == []
+    assert [(job["item"], job["last_error"]) for job in queue.dead_letters()] == [({"n": 1}, "boom again")]
+
+
+def test_busy_time_is_counted_once_when_acking_one_at_a_time(make_queue):
+    queue = make_queue("worker")
+    queue.put_many([{"n": i} for i in range(3)])
+    claimed = queue.get_many(3)
+
+    start = time.monotonic()
+    for job_id, _ in claimed:
+        time.sleep(0.2)
+        queue.ack(job_id)
+    elapsed = time.monotonic() - start
+
+    stats = queue.worker_stats.find_one({"worker_id": "worker", "queue": queue.name})
+    assert stats["processed"] == 3
+    assert stats["busy_seconds"] <= elapsed + 0.1
+
+
+def test_heartbeat_stops_once_nothing_is_held(make_queue):
+    queue = make_queue("worker", lease_seconds=0.3)
+    queue.put({"n": 1})
+    job_id, _ = queue.get_many(1)[0]
+    heartbeat = queue._heartbeat
+
+    queue.ack(job_id)
+    heartbeat.join(timeout=1)
+
+    assert not heartbeat.is_alive()
+    assert queue._heartbeat is None
+
+
+def test_close_releases_held_jobs_and_queue_stays_usable(make_queue):
+    first, second = make_queue("first"), make_queue("second")
+    first.put_many([{"n": 1}, {"n": 2}])
+    first.get_many(2)
+
+    first.close()
+
+    assert first._heartbeat is None
+    claimed = second.get_many(2)
+    assert [item for _, item in claimed] == [{"n": 1}, {"n": 2}]
+    assert second.jobs.find_one({"_id": claimed[0][0]})["attempts"] == 1
+    second.ack_many([job_id for job_id, _ in claimed])
+    first.put({"n": 3})
+    assert [item for _, item in first.get_many(1)] == [{"n": 3}]
+    assert first._heartbeat is not None
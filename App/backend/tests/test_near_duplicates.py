@@ -0,0 +1,65 @@
+from modules.near_duplicates import NearDuplicateIndex, split_near_duplicates
+
+STORY = (
+    "Apple shares rose 3% on Tuesday after the company reported record iPhone sales in China, "
+    "beating analyst expectations for the quarter. The stock has gained 20% this year."
+)
+OTHER = (
+    "Tesla deliveries fell short of estimates in the second quarter as demand for electric "
+    "vehicles cooled across Europe and the United States."
+)
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["post_id"]: doc for doc in docs}
+
+    def find(self, query, projection=None):
+        return [self.docs[post_id] for post_id in query["post_id"]["$in"] if post_id in self.docs]
+
+
+def make_index(tmp_path):
+    return NearDuplicateIndex(threshold=0.7, path=str(tmp_path / "index.db"))
+
+
+def test_copies_within_a_batch_point_at_the_first_copy(tmp_path):
+    index = make_index(tmp_path)
+    items = [{"link": "a"}, {"link": "b"}, {"link": "c"}]
+    texts = [STORY, STORY + " Reported by Reuters.", OTHER]
+
+    fresh, duplicates, signatures = split_near_duplicates(index, FakeCollection(), items, "link", texts, ["summary"])
+
+    assert fresh == [0, 2]
+    assert duplicates == {1: ("a", None)}
+    assert len(signatures) == 3
+
+
+def test_split_does_not_index_anything(tmp_path):
+    index = make_index(tmp_path)
+    split_near_duplicates(index, FakeCollection(), [{"link": "a"}], "link", [STORY], ["summary"])
+
+    assert index.find("b", index.signature(STORY)) is None
+
+
+def test_copy_of_a_stored_document_reuses_it(tmp_path):
+    index = make_index(tmp_path)
+    index.add("a", index.signature(STORY))
+    collection = FakeCollection([{"post_id": "a", "summary": "stored summary"}])
+
+    fresh, duplicates, _ = split_near_duplicates(
+        index, collection, [{"link": "b"}], "link", [STORY + " Via AP."], ["summary"]
+    )
+
+    assert fresh == []
+    assert duplicates[0][0] == "a" and duplicates[0][1]["summary"] == "stored summary"
+
+
+def test_indexed_document_that_was_never_stored_is_not_a_canonical(tmp_path):
+    index = make_index(tmp_path)
+    index.add("a", index.signature(STORY))
+
+    fresh, duplicates, _ = split_near_duplicates(
+        index, FakeCollection(), [{"link": "b"}], "link", [STORY], ["summary"]
+    )
+
+    assert fresh == [0] and duplicates == {}
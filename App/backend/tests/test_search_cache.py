@@ -0,0 +1,98 @@
+import threading
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.search_cache import TTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_load, "key", loader) for _ in range(4)]
+        release.set()
+        assert [future.result() for future in futures] == ["value"] * 4
+    assert len(calls) == 1
+
+
+def test_waiting_callers_give_up_after_timeout_and_load_still_fills_cache():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    def loader():
+        release.wait(5)
+        return "late"
+
+    with pytest.raises(TimeoutError):
+        cache.get_or_load("key", loader, timeout=0.05, run=pool.submit)
+    with pytest.raises(TimeoutError):
+        cache.get_or_load("key", loader, timeout=0.05, run=pool.submit)
+
+    release.set()
+    pool.shutdown(wait=True)
+    assert cache.get_or_load("key", loader, timeout=0.05) == "late"
+    assert cache.snapshot()["misses"] == 1
+
+
+def test_failing_to_start_a_load_is_not_cached():
+    cache = TTLCache(ttl=60)
+
+    def busy(fn, *args):
+        raise RuntimeError("no free thread")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("key", lambda: "value", run=busy)
+    assert cache.get_or_load("key", lambda: "value") == "value"
+
+
+def test_stale_refresh_goes_through_run():
+    cache = TTLCache(ttl=0, stale_ttl=60)
+    cache.get_or_load("key", lambda: "old")
+    release = threading.Event()
+    submitted = []
+
+    def loader():
+        release.wait(5)
+        return "new"
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    pool.submit(lambda: None).result()  # starts the pool's only worker before Thread is patched
+
+    def run(fn, *args):
+        submitted.append(fn)
+        return pool.submit(fn, *args)
+
+    with mock.patch("modules.search_cache.threading.Thread", side_effect=AssertionError("thread outside run")):
+        assert cache.get_or_load("key", loader, run=run) == "old"
+        assert cache.get_or_load("key", loader, run=run) == "old"
+    assert len(submitted) == 1
+
+    release.set()
+    pool.shutdown(wait=True)
+    assert cache.get_or_load("key", loader, run=run) == "new"
+
+
+def test_busy_run_skips_the_refresh_and_serves_stale():
+    cache = TTLCache(ttl=0, stale_ttl=60)
+    cache.get_or_load("key", lambda: "old")
+
+    def busy(fn, *args):
+        raise RuntimeError("no free thread")
+
+    with mock.patch("modules.search_cache.threading.Thread", side_effect=AssertionError("thread outside run")):
+        assert cache.get_or_load("key", lambda: "new", run=busy) == "old"
+        assert cache.get_or_load("key", lambda: "new", run=busy) == "old"
+    stats = cache.snapshot()
+    assert (stats["refreshes"], stats["skipped_refreshes"]) == (0, 2)
+    assert cache.get_or_load("key", lambda: "new", run=lambda fn, *args: fn(*args)) == "old"
+    assert cache.get_or_load("key", lambda: "newer") == "new"
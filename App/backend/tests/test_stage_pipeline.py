@@ -0,0 +1,21 @@
+import pytest
+
+from modules.stage_pipeline import StagePipeline
+
+
+def test_stages_receive_dependency_results_in_order():
+    pipeline = StagePipeline()
+    pipeline.add_stage("a", lambda: 2)
+    pipeline.add_stage("b", lambda: 3)
+    pipeline.add_stage("product", lambda b, a: a * b + b, depends_on=("b", "a"))
+
+    assert pipeline.run() == {"a": 2, "b": 3, "product": 9}
+
+
+def test_unresolvable_dependencies_raise():
+    pipeline = StagePipeline()
+    pipeline.add_stage("orphan", lambda missing: missing, depends_on=("missing",))
+
+    with pytest.raises(ValueError):
+        pipeline.run()
+
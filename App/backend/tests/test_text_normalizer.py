@@ -0,0 +1,75 @@
+# Golden outputs for every normalize() profile.
+# The expected strings are what the per-model cleaning chains produced before they were
+# merged into modules/text_normalizer.py, quirks included (e.g. contractions turning the
+# "U" of "U.S." into "YOU", or the news topic placeholder losing its underscores): the
+# models were trained on that text, so any change here changes what they see.
+import pytest
+from modules.text_normalizer import NormalizedText, normalize
+
+INPUTS = {
+    'markdown': '# Earnings Week\n\n**Apple** beat _estimates_, and `AAPL` is up ~~2%~~ 3%.\n\n> Guidance raised\n\n- iPhone sales\n- Services\n1. Buy\n2. Hold\n\n---\nSee [the filing](https://sec.gov/aapl) for more.',
+    'html_and_refs': '<p>Shares &amp;amp; bonds</p> &lt;b&gt;rallied&lt;/b&gt; after r/wallstreetbets and u/DeepValue posted. Visit www.example.com or http://x.co/abc now.',
+    'table': 'Quarter results:\n| Metric | Q1 | Q2 |\n|---|---|---|\n| Revenue | 10 | 12 |\nMargins improved.',
+    'contractions_and_us': "I can't believe the US economy isn't slowing. The U.S. Fed won't cut, and it's Tesla's problem now. GDP's fine.",
+    'emoji_and_escaped_newlines': "Stocks to the moon 🚀🚀 today!\\nDon't sell.\\n\\nHODL 💎🙌",
+    'plain': 'Microsoft reported revenue of $62.0 billion, up 17% year over year.',
+}
+
+EXPECTED = {
+    'ner': {
+        'markdown': 'Earnings Week Apple beat estimates, and AAPL is up 2% 3%. > Guidance raised - iPhone sales - Services 1. Buy 2. Hold --- See the filing for more.',
+        'html_and_refs': 'Shares & bonds <b>rallied</b> after and posted. Visit or now.',
+        'table': '',
+        'contractions_and_us': "I cannot believe the US economy is not slowing. The U.S. Fed will not cut, and it is Tesla's problem now. GDP's fine.",
+        'emoji_and_escaped_newlines': 'Stocks to the moon 🚀🚀 today! Do not sell. HODL 💎🙌',
+        'plain': 'Microsoft reported revenue of $62.0 billion, up 17% year over year.',
+    },
+    'summarizer': {
+        'markdown': 'Earnings Week Apple beat estimates, and AAPL is up 2% 3%. > Guidance raised - iPhone sales - Services 1. Buy 2. Hold --- See the filing for more.',
+        'html_and_refs': 'Shares & bonds <b>rallied</b> after and posted. Visit or now.',
+        'table': '',
+        'contractions_and_us': "I cannot believe the US economy is not slowing. The U.S. Fed will not cut, and it is Tesla's problem now. GDP's fine.",
+        'emoji_and_escaped_newlines': 'Stocks to the moon today! Do not sell. HODL',
+        'plain': 'Microsoft reported revenue of $62.0 billion, up 17% year over year.',
+    },
+    'sentiment': {
+        'markdown': 'Earnings Week Apple beat estimates, and AAPL is up 2% 3%. Guidance raised iPhone sales Services Buy Hold See the filing for more.',
+        'html_and_refs': 'Shares & bonds <b>rallied</b> after and posted. Visit or now.',
+        'table': 'Quarter results: Margins improved.',
+        'contractions_and_us': "I cannot believe the US economy is not slowing. The YOU.S. Fed will not cut, and it is Tesla's problem now. GDP's fine.",
+        'emoji_and_escaped_newlines': "Stocks to the moon 🚀🚀 today! Don't sell. HODL 💎🙌",
+        'plain': 'Microsoft reported revenue of $62.0 billion, up 17% year over year.',
+    },
+    'news_topics': {
+        'markdown': 'Earnings Week Apple beat estimates and AAPL is up Guidance raised iPhone sales Services Buy Hold See the filing for more',
+        'html_and_refs': 'Shares bonds bralliedb after rwallstreetbets and youDeepValue posted Visit or now',
+        'table': 'Quarter results Metric Q Q Revenue Margins improved',
+        'contractions_and_us': 'I cannot believe the USPLACEHOLDER economy is not slowing The USPLACEHOLDER Fed will not cut and it is Tesla problem now GDP fine',
+        'emoji_and_escaped_newlines': 'Stocks to the moon todaynDont sellnnHODL',
+        'plain': 'Microsoft reported revenue of billion up year over year',
+    },
+    'reddit_topics': {
+        'markdown': '# Earnings Week Apple beat estimates, and AAPL is up ~~2%~~ 3%. > Guidance raised - iPhone sales - Services 1. Buy 2. Hold --- See the filing for more.',
+        'html_and_refs': 'Shares & bonds <b>rallied</b> after and posted. Visit or now.',
+        'table': 'Quarter results: | Metric | Q1 | Q2 | |---|---|---| | Revenue | 10 | 12 | Margins improved.',
+        'contractions_and_us': "I cannot believe the U.S. economy is not slowing. The YOU.S. Fed will not cut, and it is Tesla's problem now. GDP's fine.",
+        'emoji_and_escaped_newlines': "Stocks to the moon 🚀🚀 today! Don't sell. HODL 💎🙌",
+        'plain': 'Microsoft reported revenue of $62.0 billion, up 17% year over year.',
+    },
+}
+
+CASES = [(profile, name) for profile, outputs in EXPECTED.items() for name in outputs]
+
+
+@pytest.mark.parametrize("profile, name", CASES)
+def test_normalize_matches_golden_output(profile, name):
+    assert normalize(INPUTS[name], profile) == EXPECTED[profile][name]
+
+
+@pytest.mark.parametrize("profile, name", CASES)
+def test_normalized_text_matches_golden_output(profile, name):
+    # Profiles sharing leading steps reuse cached intermediate results; the output must not change
+    document = NormalizedText(INPUTS[name])
+    for other in EXPECTED:
+        document.get(other)
+    assert document.get(profile) == EXPECTED[profile][name]